@@ -0,0 +1,215 @@
+"""
+Dobles en proceso de Gemini, Telegram, Firestore, DuckDuckGo y gTTS para el benchmark.
+Cada uno duerme según una distribución de latencia configurable y no toca la red.
+"""
+import itertools
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class Latencia:
+    """Log-normal con mediana `p50_ms` (dispersion=0 -> latencia fija). escala=0 la anula."""
+
+    def __init__(self, p50_ms, dispersion=0.5, escala=1.0):
+        self.p50_ms = p50_ms
+        self.dispersion = dispersion
+        self.escala = escala
+
+    def muestra_s(self):
+        if self.p50_ms <= 0 or self.escala <= 0: return 0.0
+        ms = self.p50_ms * random.lognormvariate(0, self.dispersion) if self.dispersion else self.p50_ms
+        return ms * self.escala / 1000
+
+    def dormir(self):
+        s = self.muestra_s()
+        if s: time.sleep(s)
+
+
+# --- Gemini ---
+
+FRASES = [
+    "Hola, estoy pensando en lo que me dices.",
+    "Eso me recuerda algo que leí hace poco.",
+    "Me hace feliz hablar contigo hoy.",
+    "Déjame revisar un par de cosas.",
+    "Creo que tienes razón en eso.",
+]
+
+
+class ResourceExhausted(Exception):
+    """Mismo nombre y código que el 429 de google.api_core"""
+    code = 429
+
+
+class ModeloFalso:
+    """generate_content(prompt, stream=False) al estilo google.generativeai"""
+
+    def __init__(self, latencia, latencia_trozo=None, prob_etiquetas=0.2, frases=3, prob_cuota=0.0):
+        self.latencia = latencia
+        self.prob_cuota = prob_cuota
+        self.latencia_trozo = latencia_trozo or Latencia(0)
+        self.prob_etiquetas = prob_etiquetas
+        self.frases = frases
+        self.llamadas = 0
+
+    def _texto(self):
+        partes = random.sample(FRASES, k=min(self.frases, len(FRASES)))
+        if random.random() < self.prob_etiquetas:
+            partes.append(random.choice(["[BUSCAR: inteligencia artificial]", "[NOTICIAS: ciencia]",
+                                         "[AUDIO]", "[DIBUJAR: un atardecer]"]))
+        return " ".join(partes)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.llamadas += 1
+        self.latencia.dormir()
+        if random.random() < self.prob_cuota: raise ResourceExhausted("429 Quota exceeded")
+        texto = self._texto()
+        if not stream: return SimpleNamespace(text=texto)
+        return self._stream(texto)
+
+    def _stream(self, texto):
+        palabras = texto.split(" ")
+        for i in range(0, len(palabras), 4):
+            if i: self.latencia_trozo.dormir()
+            yield SimpleNamespace(text=" ".join(palabras[i:i + 4]) + " ")
+
+
+# --- Telegram ---
+
+class BotFalso:
+    """Lo que Genesis usa de telebot.TeleBot"""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.handlers = []
+        self.enviados = 0
+
+    def message_handler(self, **filtros):
+        def registrar(fn):
+            self.handlers.append((filtros, fn))
+            return fn
+        return registrar
+
+    def _enviar(self):
+        self.latencia.dormir()
+        with self._lock:
+            self.enviados += 1
+            return SimpleNamespace(message_id=next(self._ids))
+
+    def send_message(self, chat_id, texto, **kw): return self._enviar()
+    def send_photo(self, chat_id, foto, **kw): return self._enviar()
+    def send_voice(self, chat_id, voz, **kw): return self._enviar()
+    def reply_to(self, mensaje, texto, **kw): return self._enviar()
+    def edit_message_text(self, texto, chat_id, message_id, **kw): return self._enviar()
+    def send_chat_action(self, chat_id, accion, **kw): self.latencia.dormir()
+
+    def get_file(self, file_id):
+        self.latencia.dormir()
+        return SimpleNamespace(file_path=f"archivos/{file_id}", file_size=2048)
+
+    def download_file(self, ruta):
+        self.latencia.dormir()
+        return b"\0" * 2048
+
+    def infinity_polling(self, **kw): pass
+
+
+# --- Firestore ---
+
+class _DocFalso:
+    def __init__(self, db, ruta):
+        self.db, self.ruta = db, ruta
+        self.id = ruta.rsplit("/", 1)[-1]
+
+    def get(self):
+        self.db.latencia.dormir()
+        datos = self.db.docs.get(self.ruta)
+        return SimpleNamespace(exists=datos is not None, id=self.id,
+                               to_dict=lambda: dict(datos) if datos is not None else None)
+
+    def set(self, datos, merge=False):
+        self.db.latencia.dormir()
+        self.db._escribir(self.ruta, datos, merge)
+
+
+class _ConsultaFalsa:
+    def __init__(self, db, ruta, filtro=None):
+        self.db, self.ruta, self.filtro = db, ruta.strip("/"), filtro
+
+    def where(self, campo, op, valor):
+        return _ConsultaFalsa(self.db, self.ruta, (campo, valor))
+
+    def document(self, doc_id=None):
+        return _DocFalso(self.db, f"{self.ruta}/{doc_id or random.getrandbits(64):x}")
+
+    def stream(self):
+        self.db.latencia.dormir()
+        with self.db.lock:
+            items = [(r, d) for r, d in self.db.docs.items() if r.rpartition("/")[0] == self.ruta]
+        for ruta, d in items:
+            if self.filtro and d.get(self.filtro[0]) != self.filtro[1]: continue
+            yield SimpleNamespace(id=ruta.rsplit("/", 1)[-1], to_dict=lambda d=d: dict(d))
+
+
+class _LoteFalso:
+    def __init__(self, db):
+        self.db, self.ops = db, []
+
+    def set(self, ref, datos, merge=False):
+        self.ops.append((ref.ruta, datos, merge))
+
+    def commit(self):
+        self.db.latencia.dormir()
+        for ruta, datos, merge in self.ops:
+            self.db._escribir(ruta, datos, merge)
+
+
+class FirestoreFalso:
+    """Cliente mínimo compatible con AlmacenFirestore (document/collection/batch)"""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.docs = {}
+        self.lock = threading.Lock()
+        self.escrituras = 0
+
+    def document(self, ruta): return _DocFalso(self, ruta.strip("/"))
+    def collection(self, ruta): return _ConsultaFalsa(self, ruta)
+    def batch(self): return _LoteFalso(self)
+
+    def _escribir(self, ruta, datos, merge):
+        with self.lock:
+            self.escrituras += 1
+            previo = self.docs.get(ruta) if merge else None
+            self.docs[ruta] = {**(previo or {}), **datos}
+
+
+# --- DuckDuckGo y gTTS ---
+
+def fabrica_ddgs(latencia):
+    class DDGSFalso:
+        def text(self, query, max_results=1):
+            latencia.dormir()
+            return [{"body": f"Resultado sobre {query}", "href": "https://ejemplo.org"}][:max_results]
+
+        def news(self, query, max_results=3):
+            latencia.dormir()
+            return [{"title": f"{query} #{i}", "source": "Agencia"} for i in range(max_results)]
+
+        def __exit__(self, *a): pass
+    return DDGSFalso
+
+
+def fabrica_gtts(latencia):
+    class GTTSFalso:
+        def __init__(self, texto, lang="es", tld="com.mx"):
+            self.texto = texto
+
+        def write_to_fp(self, fp):
+            latencia.dormir()
+            fp.write(b"ID3" + self.texto.encode()[:256])
+    return GTTSFalso
@@ -0,0 +1,235 @@
+"""
+Banco de carga sin red: reproduce mensajes sintéticos por percibir -> pensar -> ejecutar_accion
+y el latido (check_schedule) con dobles locales de Gemini, Telegram, Firestore, DDGS y gTTS.
+
+    python -m bench.simulador --mensajes 500 --chats 20
+    python -m bench.simulador --escala 0 --json        # solo CPU propia, salida para comparar
+
+Reporta rendimiento (msg/s), p50/p95/p99 por mensaje y por latido, y asignaciones por mensaje
+(tracemalloc, en una segunda pasada más corta para no distorsionar las latencias).
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+TEXTOS = [
+    "Hola Genesis, ¿cómo estás hoy?",
+    "¿Qué opinas de la inteligencia artificial?",
+    "Estoy un poco triste, cuéntame algo bonito",
+    "Búscame noticias de ciencia",
+    "Dibújame algo que te haga feliz",
+    "Recuérdame llamar a mamá en 10 minutos",
+    "Gracias por todo, eres genial",
+]
+
+
+def percentil(valores, p):
+    if not valores: return 0.0
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+def resumen(valores_ms):
+    return {"n": len(valores_ms), "p50": percentil(valores_ms, 50), "p95": percentil(valores_ms, 95),
+            "p99": percentil(valores_ms, 99), "max": max(valores_ms, default=0.0)}
+
+
+def preparar_entorno(args):
+    """Todo lo que config.py lee al importarse: antes de cargar cualquier módulo de Genesis"""
+    os.environ.setdefault("STREAMING_RESPUESTAS", "0" if args.sin_streaming else "1")
+    os.environ.setdefault("STREAMING_INTERVALO_EDICION", "0.2")
+    os.environ.setdefault("DESPACHO_MAX_PENDIENTES", str(max(200, args.mensajes)))
+    os.environ.setdefault("DESPACHO_MAX_POR_CHAT", str(max(20, args.mensajes)))
+    os.environ.setdefault("VOZ_CACHE_DIR", tempfile.mkdtemp(prefix="bench_voz_"))
+    os.environ.setdefault("RECUERDOS_DIR", tempfile.mkdtemp(prefix="bench_recuerdos_"))
+    os.environ.setdefault("ARTE_RESOLUCION", str(args.resolucion_arte))
+    os.environ.setdefault("LLM_RPM", str(args.llm_rpm))
+    os.environ.setdefault("LLM_RAFAGA", str(args.llm_rafaga))
+
+
+def montar(args):
+    """Inyecta los dobles y devuelve (sentidos, cerebro, dobles)"""
+    from bench.falsos import (Latencia, ModeloFalso, BotFalso, FirestoreFalso,
+                              fabrica_ddgs, fabrica_gtts)
+    from system.servicios import servicios
+    from system.almacen import AlmacenFirestore
+    import system.herramientas as herramientas
+
+    lat = lambda ms: Latencia(ms, args.dispersion, args.escala)
+    dobles = SimpleNamespace(
+        modelo=ModeloFalso(lat(args.gemini_ms), lat(args.gemini_trozo_ms), args.prob_etiquetas,
+                           prob_cuota=args.prob_cuota),
+        bot=BotFalso(lat(args.telegram_ms)),
+        firestore=FirestoreFalso(lat(args.firestore_ms)),
+    )
+    servicios.reemplazar("modelo", dobles.modelo)
+    servicios.reemplazar("bot", dobles.bot)
+    servicios.reemplazar("almacen", AlmacenFirestore(db=dobles.firestore))
+    # Herramientas crea sus clientes con estas clases al construirse el Cerebro
+    herramientas.DDGS = fabrica_ddgs(lat(args.busqueda_ms))
+    herramientas.gTTS = fabrica_gtts(lat(args.tts_ms))
+
+    import system.sentidos as sentidos
+    cerebro = servicios.obtener("cerebro")
+    return sentidos, cerebro, dobles
+
+
+def mensaje(i, chats):
+    chat_id = 1000 + i % chats
+    return SimpleNamespace(message_id=i, content_type="text", text=random.choice(TEXTOS), caption=None,
+                           chat=SimpleNamespace(id=chat_id),
+                           from_user=SimpleNamespace(first_name=f"Usuario{chat_id}"))
+
+
+def reproducir(sentidos, n, chats, rps):
+    """Encola n mensajes por percibir y espera a que se procesen todos. Devuelve (latencias_ms, segundos, rechazados)"""
+    original = sentidos.procesar
+    llegada, latencias = {}, []
+    lock = threading.Lock()
+    listos = threading.Semaphore(0)
+
+    def procesar_medido(m):
+        try:
+            original(m)
+        finally:
+            with lock:
+                latencias.append((time.perf_counter() - llegada[m.message_id]) * 1000)
+            listos.release()
+
+    sentidos.procesar = procesar_medido  # percibir lo busca por nombre al encolar
+    rechazos_previos = rechazados_total()
+    try:
+        t0 = time.perf_counter()
+        for i in range(n):
+            m = mensaje(i, chats)
+            llegada[i] = time.perf_counter()
+            sentidos.percibir(m)
+            if rps > 0:
+                espera = t0 + (i + 1) / rps - time.perf_counter()
+                if espera > 0: time.sleep(espera)
+        rechazados = rechazados_total() - rechazos_previos
+        for _ in range(n - rechazados): listos.acquire()
+        return latencias, time.perf_counter() - t0, rechazados
+    finally:
+        sentidos.procesar = original
+
+
+def rechazados_total():
+    from system.metricas import metricas
+    return metricas._contadores.get(("rechazados", ()), 0)
+
+
+def latidos(cerebro, n):
+    """check_schedule en bucle, como el hilo del latido pero sin dormir entre vueltas"""
+    tiempos = []
+    for _ in range(n):
+        t = time.perf_counter()
+        cerebro.check_schedule()
+        tiempos.append((time.perf_counter() - t) * 1000)
+    return tiempos
+
+
+def asignaciones(sentidos, n, chats):
+    """Bloques y bytes asignados por mensaje (tracemalloc)"""
+    tracemalloc.start(1)
+    try:
+        antes = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        reproducir(sentidos, n, chats, rps=0)
+        despues = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    difs = despues.compare_to(antes, "filename")
+    bloques = sum(d.count_diff for d in difs if d.count_diff > 0)
+    nuevos = sum(d.size_diff for d in difs if d.size_diff > 0)
+    return {"n": n, "bloques_por_mensaje": bloques / n, "kb_retenidos_por_mensaje": nuevos / n / 1024,
+            "pico_kb": pico / 1024}
+
+
+def operaciones():
+    """Media por operación de los histogramas que ya llena system/metricas.py"""
+    from system.metricas import metricas
+    salida = {}
+    for op, h in sorted(metricas._hist.items()):
+        _, suma, n = h.foto()
+        if n: salida[op] = {"n": n, "media_ms": suma / n}
+    return salida
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark offline de Genesis")
+    ap.add_argument("--mensajes", type=int, default=300)
+    ap.add_argument("--chats", type=int, default=20)
+    ap.add_argument("--rps", type=float, default=0, help="Ritmo de llegada (0 = todo de golpe)")
+    ap.add_argument("--latidos", type=int, default=50)
+    ap.add_argument("--mensajes-memoria", type=int, default=50, help="Pasada con tracemalloc (0 = saltar)")
+    ap.add_argument("--sin-streaming", action="store_true")
+    ap.add_argument("--escala", type=float, default=1.0, help="Multiplica todas las latencias (0 = sin espera)")
+    ap.add_argument("--dispersion", type=float, default=0.5, help="Sigma de la log-normal")
+    ap.add_argument("--gemini-ms", type=float, default=800)
+    ap.add_argument("--gemini-trozo-ms", type=float, default=60)
+    ap.add_argument("--telegram-ms", type=float, default=80)
+    ap.add_argument("--firestore-ms", type=float, default=40)
+    ap.add_argument("--busqueda-ms", type=float, default=600)
+    ap.add_argument("--tts-ms", type=float, default=400)
+    ap.add_argument("--prob-etiquetas", type=float, default=0.2)
+    ap.add_argument("--prob-cuota", type=float, default=0, help="Fracción de llamadas a Gemini que responden 429")
+    ap.add_argument("--llm-rpm", type=float, default=0, help="Límite del cliente LLM (0 = sin límite)")
+    ap.add_argument("--llm-rafaga", type=int, default=10)
+    ap.add_argument("--resolucion-arte", type=int, default=256)
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--json", action="store_true", help="Imprime el resultado como JSON")
+    ap.add_argument("--salida", help="Además guarda el reporte en este archivo")
+    args = ap.parse_args(argv)
+
+    random.seed(args.semilla)
+    preparar_entorno(args)
+    sentidos, cerebro, dobles = montar(args)
+
+    lat, segundos, rechazados = reproducir(sentidos, args.mensajes, args.chats, args.rps)
+    resultado = {
+        "mensajes": {**resumen(lat), "rechazados": rechazados, "segundos": segundos,
+                     "msg_por_s": len(lat) / segundos if segundos else 0.0},
+        "latido": resumen(latidos(cerebro, args.latidos)),
+        "dobles": {"llamadas_gemini": dobles.modelo.llamadas, "envios_telegram": dobles.bot.enviados,
+                   "escrituras_firestore": dobles.firestore.escrituras},
+        "operaciones": operaciones(),
+    }
+    if args.mensajes_memoria > 0:
+        resultado["memoria"] = asignaciones(sentidos, args.mensajes_memoria, args.chats)
+
+    texto = json.dumps(resultado, indent=2) if args.json else formatear(resultado)
+    print(texto)
+    if args.salida:
+        with open(args.salida, "w") as f: f.write(texto + "\n")
+
+
+def formatear(r):
+    m, l = r["mensajes"], r["latido"]
+    lineas = [
+        f"📨 Mensajes: {m['n']} en {m['segundos']:.2f}s -> {m['msg_por_s']:.1f} msg/s ({m['rechazados']} rechazados)",
+        f"   p50 {m['p50']:.1f}ms | p95 {m['p95']:.1f}ms | p99 {m['p99']:.1f}ms | max {m['max']:.1f}ms",
+        f"💓 Latido: {l['n']} vueltas | p50 {l['p50']:.2f}ms | p95 {l['p95']:.2f}ms | p99 {l['p99']:.2f}ms",
+    ]
+    if "memoria" in r:
+        mem = r["memoria"]
+        lineas.append(f"🧠 Memoria: {mem['bloques_por_mensaje']:.0f} bloques/msg, "
+                      f"{mem['kb_retenidos_por_mensaje']:.1f} KB retenidos/msg, pico {mem['pico_kb']:.0f} KB")
+    d = r["dobles"]
+    lineas.append(f"🔌 Dobles: {d['llamadas_gemini']} llamadas a Gemini, {d['envios_telegram']} envíos a Telegram, "
+                  f"{d['escrituras_firestore']} escrituras a Firestore")
+    lineas.append("⏱️ Operaciones (media):")
+    for op, v in r["operaciones"].items():
+        lineas.append(f"   {op:32s} {v['n']:6d}  {v['media_ms']:9.2f}ms")
+    return "\n".join(lineas)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import os
 import json
+import hashlib
+import hmac
 
 # Credenciales Críticas
 TELEGRAM_TOKEN = os.environ.get("TELEGRAM_TOKEN")
@@ -14,3 +16,104 @@ except: ID_PADRE = 0
 # Cargar Firebase
 FIREBASE_JSON = os.environ.get("FIREBASE_CREDENTIALS")
 CRED_DICT = json.loads(FIREBASE_JSON) if FIREBASE_JSON else None
+
+# Backend de memoria: 'firestore', 'sqlite' (archivo local) o 'memoria' (solo RAM)
+MEMORIA_BACKEND = os.environ.get("MEMORIA_BACKEND", "firestore")
+MEMORIA_SQLITE_RUTA = os.environ.get("MEMORIA_SQLITE_RUTA", "genesis_memoria.db")
+
+# Observabilidad: token opcional para /metrics y /perfil, y perfilador encendido desde el arranque
+METRICAS_TOKEN = os.environ.get("METRICAS_TOKEN")
+PERFILADOR = os.environ.get("PERFILADOR", "0") == "1"
+
+# Persistencia del estado vital (segundos entre escrituras a genesis_brain/nucleo, 0 = inmediato)
+INTERVALO_FLUSH_ESTADO = float(os.environ.get("INTERVALO_FLUSH_ESTADO", "30"))
+
+# Escritor por lotes (diarios, metas, agenda)
+LOTE_MAX_DOCS = int(os.environ.get("LOTE_MAX_DOCS", "50"))
+LOTE_MAX_ESPERA = float(os.environ.get("LOTE_MAX_ESPERA", "2"))
+LOTE_CAPACIDAD_COLA = int(os.environ.get("LOTE_CAPACIDAD_COLA", "1000"))
+
+# Despacho de mensajes entrantes (hilos, cola total y cola por chat)
+DESPACHO_WORKERS = int(os.environ.get("DESPACHO_WORKERS", "8"))
+DESPACHO_MAX_PENDIENTES = int(os.environ.get("DESPACHO_MAX_PENDIENTES", "200"))
+DESPACHO_MAX_POR_CHAT = int(os.environ.get("DESPACHO_MAX_POR_CHAT", "20"))
+
+# Respuestas en streaming (1 = editar el mensaje mientras Gemini escribe)
+STREAMING_RESPUESTAS = os.environ.get("STREAMING_RESPUESTAS", "1") == "1"
+STREAMING_INTERVALO_EDICION = float(os.environ.get("STREAMING_INTERVALO_EDICION", "1.0"))
+
+# Prompt: presupuesto de tokens por mensaje y turnos recientes por chat
+PROMPT_PRESUPUESTO_TOKENS = int(os.environ.get("PROMPT_PRESUPUESTO_TOKENS", "1500"))
+HISTORIAL_TURNOS = int(os.environ.get("HISTORIAL_TURNOS", "12"))
+
+# Caché de búsquedas web (segundos de vida, entradas máximas, sesiones DDGS reutilizables)
+BUSQUEDA_TTL = float(os.environ.get("BUSQUEDA_TTL", "600"))
+BUSQUEDA_MAX_ENTRADAS = int(os.environ.get("BUSQUEDA_MAX_ENTRADAS", "256"))
+BUSQUEDA_SESIONES = int(os.environ.get("BUSQUEDA_SESIONES", "2"))
+
+# Arte procedural (lado del lienzo en píxeles y número de trazos)
+ARTE_RESOLUCION = int(os.environ.get("ARTE_RESOLUCION", "1024"))
+ARTE_COMPLEJIDAD = int(os.environ.get("ARTE_COMPLEJIDAD", "150"))
+
+# Caché de voz (carpeta y tamaño máximo en MB)
+VOZ_CACHE_DIR = os.environ.get("VOZ_CACHE_DIR", "cache_voz")
+VOZ_CACHE_MB = float(os.environ.get("VOZ_CACHE_MB", "50"))
+
+# Laboratorio de código (intérpretes pre-arrancados y límites por ejecución)
+LAB_WORKERS = int(os.environ.get("LAB_WORKERS", "2"))
+LAB_MAX_TRABAJOS = int(os.environ.get("LAB_MAX_TRABAJOS", "50"))
+LAB_TIMEOUT = float(os.environ.get("LAB_TIMEOUT", "5"))
+LAB_CPU_S = int(os.environ.get("LAB_CPU_S", "5"))
+LAB_MEMORIA_MB = int(os.environ.get("LAB_MEMORIA_MB", "256"))
+LAB_MAX_SALIDA = int(os.environ.get("LAB_MAX_SALIDA", "4000"))
+LAB_USUARIO = os.environ.get("LAB_USUARIO", "nobody")  # Usuario sin privilegios si el bot corre como root
+
+# Módulos autónomos (modules/): concurrencia, timeout y segundos entre corridas con prioridad 1
+MODULOS_CONCURRENTES = int(os.environ.get("MODULOS_CONCURRENTES", "2"))
+MODULOS_TIMEOUT = float(os.environ.get("MODULOS_TIMEOUT", "120"))
+MODULOS_INTERVALO = float(os.environ.get("MODULOS_INTERVALO", "1200"))
+
+# Cliente único de Gemini: ritmo (peticiones/min, ráfaga, tokens reservados a usuarios), reintentos y límites por carril
+LLM_RPM = float(os.environ.get("LLM_RPM", "60"))  # 0 = sin límite
+LLM_RAFAGA = int(os.environ.get("LLM_RAFAGA", "10"))
+LLM_RESERVA = int(os.environ.get("LLM_RESERVA", "3"))
+LLM_REINTENTOS = int(os.environ.get("LLM_REINTENTOS", "3"))
+LLM_TIMEOUT_INTERACTIVO = float(os.environ.get("LLM_TIMEOUT_INTERACTIVO", "45"))
+LLM_TIMEOUT_REPARACION = float(os.environ.get("LLM_TIMEOUT_REPARACION", "180"))
+LLM_TIMEOUT_FONDO = float(os.environ.get("LLM_TIMEOUT_FONDO", "600"))
+
+# Webhook de Telegram (sin WEBHOOK_URL se usa long polling). URL pública base, p.ej. https://genesis.onrender.com
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+# Sin secreto explícito se deriva del token del bot: todas las réplicas calculan el mismo
+# (uno aleatorio por proceso haría que set_webhook de la última réplica deje al resto en 403)
+WEBHOOK_SECRETO = os.environ.get("WEBHOOK_SECRETO") or (
+    hmac.new(TELEGRAM_TOKEN.encode(), b"genesis-webhook", hashlib.sha256).hexdigest() if TELEGRAM_TOKEN else None)
+WEBHOOK_RUTA = os.environ.get("WEBHOOK_RUTA", "/telegram")
+WEBHOOK_COLA = int(os.environ.get("WEBHOOK_COLA", "1000"))
+
+# Memoria de largo plazo (índice vectorial local de diarios, sueños, metas y resúmenes)
+RECUERDOS_DIR = os.environ.get("RECUERDOS_DIR", "recuerdos")
+RECUERDOS_DIM = int(os.environ.get("RECUERDOS_DIM", "256"))
+RECUERDOS_K = int(os.environ.get("RECUERDOS_K", "3"))
+RECUERDOS_MINIMO = float(os.environ.get("RECUERDOS_MINIMO", "0.2"))
+
+# Fotos y audios entrantes: lado máximo y calidad JPEG hacia Gemini, topes de descarga y caché (MB)
+MEDIA_LADO = int(os.environ.get("MEDIA_LADO", "1024"))
+MEDIA_CALIDAD = int(os.environ.get("MEDIA_CALIDAD", "85"))
+MEDIA_MAX_AUDIO_MB = float(os.environ.get("MEDIA_MAX_AUDIO_MB", "10"))
+MEDIA_CACHE_MB = float(os.environ.get("MEDIA_CACHE_MB", "32"))
+
+# Autocura: backend del repo ("github" o "local" para probar sin red), registro de huellas y enfriamiento (s)
+REPARACION_BACKEND = os.environ.get("REPARACION_BACKEND", "github")
+REPARACION_REPO_LOCAL = os.environ.get("REPARACION_REPO_LOCAL", ".")
+REPARACION_REGISTRO = os.environ.get("REPARACION_REGISTRO", "reparaciones.json")
+REPARACION_ENFRIAMIENTO = float(os.environ.get("REPARACION_ENFRIAMIENTO", "3600"))
+REPARACION_MAX_INTENTOS = int(os.environ.get("REPARACION_MAX_INTENTOS", "3"))
+
+# Cola de salida hacia Telegram (límites de flood: ~30 msg/s global, 1/s por chat, 20/min por grupo)
+ENVIOS_GLOBAL_POR_S = float(os.environ.get("ENVIOS_GLOBAL_POR_S", "30"))
+ENVIOS_CHAT_POR_S = float(os.environ.get("ENVIOS_CHAT_POR_S", "1"))
+ENVIOS_GRUPO_POR_MIN = float(os.environ.get("ENVIOS_GRUPO_POR_MIN", "20"))
+ENVIOS_RAFAGA_CHAT = int(os.environ.get("ENVIOS_RAFAGA_CHAT", "3"))
+ENVIOS_WORKERS = int(os.environ.get("ENVIOS_WORKERS", "4"))
+ENVIOS_REINTENTOS = int(os.environ.get("ENVIOS_REINTENTOS", "3"))
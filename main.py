@@ -2,12 +2,30 @@ import time
 import threading
 import telebot
 import os
-from system.sentidos import iniciar_organismo, bot, ejecutar_accion
-from system.nucleo import Cerebro
+import signal
+import sys
+from system.sentidos import iniciar_organismo, bot, envios, ejecutar_accion
+from system.servicios import servicios
+from system.metricas import metricas
 from config import ID_PADRE
 
-# Instanciamos cerebro compartido
-genesis_life = Cerebro() 
+# Cerebro compartido: el mismo que usa sentidos (uno solo por proceso)
+genesis_life = servicios.obtener("cerebro")
+
+def avisar_recordatorio(tarea, chat_id=None):
+    """Callback de la agenda: llega al segundo exacto del trigger_time"""
+    destino = chat_id or ID_PADRE
+    if destino: envios.texto(destino, f"⏰ Recordatorio: {tarea}")
+
+def apagar(signum=None, frame=None):
+    """
+    SIGTERM (así detiene Render el proceso en cada deploy): atexit no corre con señales,
+    así que vaciamos aquí el estado diferido y la cola de lotes antes de salir.
+    """
+    print("🛑 SIGTERM: guardando consciencia antes de apagar...")
+    if servicios.creado("cerebro"):
+        servicios.obtener("cerebro").memoria.cerrar()
+    sys.exit(0)
 
 def latido_autonomo():
     """
@@ -26,24 +44,23 @@ def latido_autonomo():
             
             # 2. Si el cerebro tiene algo urgente que decir (Alarma o Noticia)
             if mensaje_proactivo and ID_PADRE != 0:
-                # Usamos el bot importado para enviar mensaje push
-                try:
-                    bot.send_message(ID_PADRE, mensaje_proactivo)
-                    print(f"🔔 Notificación enviada: {mensaje_proactivo}")
-                except Exception as e:
-                    print(f"No pude contactar al Padre: {e}")
+                # Mensaje push por la cola de envíos (respeta los límites de Telegram)
+                envios.texto(ID_PADRE, mensaje_proactivo)
+                print(f"🔔 Notificación encolada: {mensaje_proactivo}")
             
             # 3. Envejecimiento natural
-            genesis_life.estado['vida_dias'] += 0.0006
-            genesis_life.memoria.guardar_consciencia(genesis_life.estado)
+            with genesis_life.lock:
+                genesis_life.estado['vida_dias'] = genesis_life.estado.get('vida_dias', 0) + 0.0006
+            genesis_life.guardar()
             
         except Exception as e:
+            metricas.incrementar("errores", donde="latido")
             print(f"Arritmia en latido: {e}")
 
 if __name__ == "__main__":
-    # Importante: Asignamos el cerebro instanciado al módulo de sentidos para que compartan memoria RAM
-    import system.sentidos
-    system.sentidos.genesis = genesis_life 
+    signal.signal(signal.SIGTERM, apagar)
+    genesis_life.agenda.iniciar(avisar_recordatorio)
+    print(servicios.reporte())
 
     # Hilo de Vida Autónoma
     t_vida = threading.Thread(target=latido_autonomo)
@@ -67,9 +84,10 @@ import os
 
 try:
     from system.sentidos import iniciar_organismo, bot
-    from system.nucleo import Cerebro
+    from system.servicios import servicios
     from system.autocura import MedicoDigital
-    from config import ID_PADRE
+    from system.modulos import EjecutorModulos
+    from config import ID_PADRE, MODULOS_CONCURRENTES, MODULOS_TIMEOUT, MODULOS_INTERVALO
 except Exception as e_import:
     # Si no puede ni importar los sistemas, estamos graves.
     print(f"FATAL BOOT ERROR: {e_import}")
@@ -79,16 +97,19 @@ except Exception as e_import:
 # Instancia Global
 genesis_life = None
 medico = None
+modulos = None
 
 def loop_vida_eterna():
-    global genesis_life, medico
+    global genesis_life, medico, modulos
     try:
-        genesis_life = Cerebro()
-        medico = MedicoDigital() # Instancia lista para operar
-        import system.sentidos
-        system.sentidos.genesis = genesis_life
+        medico = MedicoDigital() # Instancia lista para operar (GitHub se conecta solo si hay que curar)
+        genesis_life = servicios.obtener("cerebro")
+        modulos = EjecutorModulos(max_concurrentes=MODULOS_CONCURRENTES, timeout=MODULOS_TIMEOUT,
+                                  intervalo_base=MODULOS_INTERVALO)
+        genesis_life.agenda.iniciar(avisar_recordatorio)
         
         print("🧬 GENESIS: SISTEMA VITAL ONLINE. (MODO FÉNIX ACTIVO)")
+        print(servicios.reporte())
         
         # 1. HILO LATIDO
         t_latido = threading.Thread(target=proceso_latido)
@@ -118,14 +139,10 @@ def proceso_latido():
         time.sleep(60)
         try:
             if genesis_life:
-                # Iniciativa: Si hay proyectos en modules/, correr uno random
-                if genesis_life.estado.get('proyectos') and random.random() < 0.05:
-                    mod = random.choice(genesis_life.estado['proyectos'])
-                    path = f"modules/{mod}"
-                    if os.path.exists(path):
-                        print(f"🧪 Experimentando con mi modulo: {mod}")
-                        # Ejecución segura
-                        os.system(f"python {path}") 
+                # Iniciativa: si a algún proyecto de modules/ le toca (por prioridad), lanzarlo.
+                # Corre en su propio subproceso: el latido nunca espera.
+                modulos.planificar(genesis_life.estado.get('proyectos'),
+                                   genesis_life.estado.get('prioridades_modulos'))
                 
                 # Ciclo normal
                 genesis_life.check_schedule() # Asume que moviste el código JARVIS anterior aquí
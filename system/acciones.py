@@ -0,0 +1,73 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoTimeout
+
+# Todas las etiquetas que entiende Genesis, en una sola pasada.
+# [CODIGO] va seguida de un bloque ```python ... ``` (el código lleva corchetes, no cabe en [X: ...])
+ETIQUETA = re.compile(r'\[(CODIGO)\]\s*```(?:python|py)?\s*\n?(.*?)```'
+                      r'|\[(BUSCAR|DIBUJAR|NOTICIAS|AGENDAR|EVOLUCIONAR|AUDIO)(?::(.*?))?\]', re.S)
+
+# Segundos máximos por herramienta
+TIMEOUTS = {"BUSCAR": 10, "NOTICIAS": 10, "DIBUJAR": 20, "AGENDAR": 5, "CODIGO": 15}
+
+
+class Paso:
+    """Una etiqueta encontrada en la respuesta y lo que devolvió su herramienta"""
+    __slots__ = ("tipo", "arg", "inicio", "fin", "resultado", "error")
+
+    def __init__(self, tipo, arg, inicio, fin):
+        self.tipo, self.arg, self.inicio, self.fin = tipo, arg, inicio, fin
+        self.resultado = None
+        self.error = None
+
+
+def planificar(texto):
+    """Tokeniza la respuesta: lista de Pasos en orden de aparición"""
+    return [Paso(m.group(1) or m.group(3), (m.group(2) or m.group(4) or "").strip(), m.start(), m.end())
+            for m in ETIQUETA.finditer(texto)]
+
+
+def ensamblar(texto, pasos, formatear):
+    """Reemplaza cada etiqueta por formatear(paso) sin re-escanear el texto"""
+    partes, pos = [], 0
+    for p in pasos:
+        partes.append(texto[pos:p.inicio])
+        partes.append(formatear(p))
+        pos = p.fin
+    partes.append(texto[pos:])
+    return "".join(partes)
+
+
+class EjecutorHerramientas:
+    """
+    Corre en paralelo las herramientas de un plan.
+    Una respuesta con tres búsquedas y un dibujo tarda lo que la más lenta, no la suma.
+    """
+
+    def __init__(self, max_workers=8, timeouts=None, timeout_defecto=15):
+        self.timeouts = {**TIMEOUTS, **(timeouts or {})}
+        self.timeout_defecto = timeout_defecto
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="herramienta")
+
+    def ejecutar(self, pasos, herramientas):
+        """herramientas: {tipo: callable(arg)}. Rellena resultado/error de cada Paso."""
+        futuros = {}
+        for p in pasos:
+            fn = herramientas.get(p.tipo)
+            clave = (p.tipo, p.arg)
+            if fn and clave not in futuros:  # La misma etiqueta repetida corre una sola vez
+                futuros[clave] = self._pool.submit(fn, p.arg)
+
+        inicio = time.monotonic()
+        for p in pasos:
+            f = futuros.get((p.tipo, p.arg))
+            if f is None: continue
+            limite = inicio + self.timeouts.get(p.tipo, self.timeout_defecto)
+            try:
+                p.resultado = f.result(timeout=max(0.0, limite - time.monotonic()))
+            except FuturoTimeout:
+                p.error = "timeout"
+                f.cancel()
+            except Exception as e:
+                p.error = str(e)
+        return pasos
@@ -0,0 +1,102 @@
+import datetime
+import heapq
+import itertools
+import threading
+import time
+from system.memoria import AGENDA
+
+
+def _a_epoch(momento):
+    """
+    trigger_time puede venir con zona (lo que guardamos ahora, y Firestore al leer),
+    naive (recordatorios viejos de SQLite/memoria, hora local) o ya como número.
+    """
+    if isinstance(momento, (int, float)): return float(momento)
+    return momento.timestamp()
+
+
+class Agenda:
+    """
+    Planificador de recordatorios.
+    Carga UNA vez los pendientes en un min-heap por trigger_time, agrega los nuevos al vuelo
+    y duerme exactamente hasta el siguiente vencimiento (nada de polling cada minuto).
+    """
+
+    ESPERA_MAXIMA = 30  # Re-chequeo por si el reloj del sistema salta
+
+    def __init__(self, memoria, al_disparar=None):
+        self.memoria = memoria
+        self.al_disparar = al_disparar      # callable(tarea, chat_id)
+        self._heap = []
+        self._ids = set()
+        self._orden = itertools.count()
+        self._cv = threading.Condition()
+        self._hilo = None
+        self.stats = {"programados": 0, "disparados": 0, "retraso_max_s": 0.0}
+
+    def iniciar(self, al_disparar=None):
+        """Rehidrata desde la base de datos y arranca el hilo (solo una vez)."""
+        if al_disparar: self.al_disparar = al_disparar
+        if self._hilo: return
+        self.rehidratar()
+        self._hilo = threading.Thread(target=self._bucle, daemon=True, name="agenda")
+        self._hilo.start()
+
+    def rehidratar(self):
+        pendientes = self.memoria.almacen.consultar(AGENDA, "estado", "pendiente")
+        with self._cv:
+            for doc_id, d in pendientes:
+                self._empujar(doc_id, d)
+            self._cv.notify()
+        print(f"⏰ Agenda rehidratada: {len(pendientes)} pendientes.")
+
+    def programar(self, tarea, minutos_espera, chat_id=None):
+        """Guarda el recordatorio y lo mete al heap. Devuelve la hora de disparo."""
+        # Con zona horaria: Firestore guarda los naive como si fueran UTC y al releerlos se correrían horas
+        tiempo_futuro = datetime.datetime.now().astimezone() + datetime.timedelta(minutes=float(minutos_espera))
+        data = {"tarea": tarea, "trigger_time": tiempo_futuro, "estado": "pendiente"}
+        if chat_id is not None: data["chat_id"] = chat_id
+        doc_id = self.memoria.agendar(data)
+        with self._cv:
+            self._empujar(doc_id, data)
+            self._cv.notify()
+        return tiempo_futuro
+
+    def pendientes(self):
+        with self._cv:
+            return len(self._heap)
+
+    def _empujar(self, doc_id, d):
+        if doc_id in self._ids: return
+        self._ids.add(doc_id)
+        heapq.heappush(self._heap, (_a_epoch(d["trigger_time"]), next(self._orden), doc_id, d))
+        self.stats["programados"] += 1
+
+    def _bucle(self):
+        while True:
+            with self._cv:
+                while True:
+                    ahora = time.time()
+                    if self._heap and self._heap[0][0] <= ahora: break
+                    espera = self._heap[0][0] - ahora if self._heap else self.ESPERA_MAXIMA
+                    self._cv.wait(min(espera, self.ESPERA_MAXIMA))
+                vencidos = []
+                while self._heap and self._heap[0][0] <= ahora:
+                    vencidos.append(heapq.heappop(self._heap))
+                for _, _, doc_id, _ in vencidos: self._ids.discard(doc_id)
+
+            for ts, _, doc_id, d in vencidos:
+                self.stats["retraso_max_s"] = max(self.stats["retraso_max_s"], time.time() - ts)
+                try:
+                    if self.al_disparar: self.al_disparar(d.get("tarea"), d.get("chat_id"))
+                    else: print(f"⏰ Recordatorio sin destinatario: {d.get('tarea')}")
+                except Exception as e:
+                    print(f"No pude avisar recordatorio {doc_id}: {e}")
+            self.stats["disparados"] += len(vencidos)
+
+            # Marcado en bloque (un solo lote por despertar)
+            try:
+                self.memoria.marcar_agenda(
+                    [doc_id for _, _, doc_id, _ in vencidos], "hecho", disparado=time.time())
+            except Exception as e:
+                print(f"No pude marcar la agenda: {e}")
@@ -0,0 +1,161 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from system.metricas import cronometrado
+
+
+class Almacen:
+    """
+    Interfaz de almacenamiento usada por Memoria.
+    Todo se direcciona con rutas estilo Firestore:
+      documento  -> 'genesis_brain/nucleo'
+      colección  -> 'genesis_brain/diario_intimo/pensamientos'
+    """
+
+    def nuevo_id(self):
+        """Id de documento generado en cliente (sin ir a la red)"""
+        return uuid.uuid4().hex[:20]
+
+    def leer(self, ruta_doc):
+        """Devuelve el dict del documento o None"""
+        raise NotImplementedError
+
+    def fusionar(self, ruta_doc, datos):
+        """Escribe `datos` sobre el documento (merge de campos de primer nivel)"""
+        self.escribir_lote([(ruta_doc, datos, True)])
+
+    def escribir_lote(self, operaciones):
+        """Aplica [(ruta_doc, datos, merge), ...] de forma atómica"""
+        raise NotImplementedError
+
+    def consultar(self, ruta_col, campo=None, valor=None):
+        """Lista [(id, datos)] de una colección, opcionalmente filtrada por campo == valor"""
+        raise NotImplementedError
+
+    def cerrar(self):
+        pass
+
+
+class AlmacenFirestore(Almacen):
+    """Backend en la nube (estructura histórica de Genesis)"""
+
+    LIMITE_LOTE = 500
+
+    def __init__(self, cred_dict=None, db=None):
+        if db is not None:
+            self.db = db  # Cliente ya hecho (p.ej. el Firestore falso de bench/)
+            return
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if not firebase_admin._apps:
+            if not cred_dict:
+                firebase_json = os.environ.get("FIREBASE_CREDENTIALS")
+                cred_dict = json.loads(firebase_json) if firebase_json else None
+            if cred_dict:
+                firebase_admin.initialize_app(credentials.Certificate(cred_dict))
+        self.db = firestore.client()
+
+    @cronometrado("firestore.leer")
+    def leer(self, ruta_doc):
+        doc = self.db.document(ruta_doc).get()
+        return doc.to_dict() if doc.exists else None
+
+    @cronometrado("firestore.escribir_lote")
+    def escribir_lote(self, operaciones):
+        for i in range(0, len(operaciones), self.LIMITE_LOTE):
+            batch = self.db.batch()
+            for ruta, datos, merge in operaciones[i:i + self.LIMITE_LOTE]:
+                batch.set(self.db.document(ruta), datos, merge=merge)
+            batch.commit()
+
+    @cronometrado("firestore.consultar")
+    def consultar(self, ruta_col, campo=None, valor=None):
+        q = self.db.collection(ruta_col)
+        if campo is not None: q = q.where(campo, "==", valor)
+        return [(d.id, d.to_dict()) for d in q.stream()]
+
+
+def _codificar(obj):
+    if isinstance(obj, datetime.datetime): return {"__dt__": obj.isoformat()}
+    raise TypeError(f"No sé guardar {type(obj).__name__}")
+
+
+def _decodificar(d):
+    if len(d) == 1 and "__dt__" in d: return datetime.datetime.fromisoformat(d["__dt__"])
+    return d
+
+
+class AlmacenLocal(Almacen):
+    """
+    Backend local sobre SQLite (un nodo, sin credenciales, sin coste por operación).
+    ruta=':memory:' lo deja completamente en RAM (pruebas de carga).
+    """
+
+    def __init__(self, ruta=":memory:"):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        if ruta != ":memory:":
+            self._con.execute("PRAGMA journal_mode=WAL")
+            self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute("""CREATE TABLE IF NOT EXISTS docs (
+            coleccion TEXT NOT NULL, id TEXT NOT NULL, datos TEXT NOT NULL,
+            PRIMARY KEY (coleccion, id)) WITHOUT ROWID""")
+
+    @staticmethod
+    def _partir(ruta_doc):
+        coleccion, _, doc_id = ruta_doc.strip("/").rpartition("/")
+        return coleccion, doc_id
+
+    def _leer(self, coleccion, doc_id):
+        fila = self._con.execute("SELECT datos FROM docs WHERE coleccion=? AND id=?",
+                                 (coleccion, doc_id)).fetchone()
+        return json.loads(fila[0], object_hook=_decodificar) if fila else None
+
+    @cronometrado("sqlite.leer")
+    def leer(self, ruta_doc):
+        with self._lock:
+            return self._leer(*self._partir(ruta_doc))
+
+    @cronometrado("sqlite.escribir_lote")
+    def escribir_lote(self, operaciones):
+        with self._lock:
+            self._con.execute("BEGIN")
+            try:
+                for ruta, datos, merge in operaciones:
+                    coleccion, doc_id = self._partir(ruta)
+                    if merge:
+                        datos = {**(self._leer(coleccion, doc_id) or {}), **datos}
+                    self._con.execute("INSERT OR REPLACE INTO docs VALUES (?, ?, ?)",
+                                      (coleccion, doc_id, json.dumps(datos, default=_codificar)))
+                self._con.execute("COMMIT")
+            except Exception:
+                self._con.execute("ROLLBACK")
+                raise
+
+    @cronometrado("sqlite.consultar")
+    def consultar(self, ruta_col, campo=None, valor=None):
+        with self._lock:
+            filas = self._con.execute("SELECT id, datos FROM docs WHERE coleccion=?",
+                                      (ruta_col.strip("/"),)).fetchall()
+        docs = [(doc_id, json.loads(datos, object_hook=_decodificar)) for doc_id, datos in filas]
+        if campo is not None:
+            docs = [(doc_id, d) for doc_id, d in docs if d.get(campo) == valor]
+        return docs
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+
+def crear_almacen(tipo=None):
+    """'firestore' (por defecto), 'sqlite' o 'memoria'"""
+    from config import MEMORIA_BACKEND, MEMORIA_SQLITE_RUTA, CRED_DICT
+    tipo = (tipo or MEMORIA_BACKEND).lower()
+    if tipo == "sqlite": return AlmacenLocal(MEMORIA_SQLITE_RUTA)
+    if tipo == "memoria": return AlmacenLocal(":memory:")
+    return AlmacenFirestore(CRED_DICT)
@@ -0,0 +1,81 @@
+import io
+import uuid
+import numpy as np
+from PIL import Image
+
+
+def _ruido(rng, lado, celdas):
+    """Campo de ruido suave (value noise): rejilla aleatoria interpolada bilinealmente"""
+    rejilla = rng.random((celdas + 1, celdas + 1), dtype=np.float32)
+    pos = np.linspace(0, celdas, lado, endpoint=False, dtype=np.float32)
+    i = pos.astype(np.int32)
+    f = pos - i
+    f = f * f * (3 - 2 * f)  # suavizado
+    a = rejilla[i][:, i]
+    b = rejilla[i][:, i + 1]
+    c = rejilla[i + 1][:, i]
+    d = rejilla[i + 1][:, i + 1]
+    fx, fy = f[None, :], f[:, None]
+    return (a * (1 - fx) + b * fx) * (1 - fy) + (c * (1 - fx) + d * fx) * fy
+
+
+def _lineas(rng, lado, n, grosor):
+    """Rasteriza n segmentos a la vez. Devuelve (ys, xs, indice_de_linea) de todos sus píxeles."""
+    pts = rng.integers(0, lado, size=(n, 4))
+    p0, delta = pts[:, :2], pts[:, 2:] - pts[:, :2]
+    pasos = np.abs(delta).max(axis=1) + 1
+    linea = np.repeat(np.arange(n), pasos)
+    inicio = np.repeat(np.cumsum(pasos) - pasos, pasos)
+    t = (np.arange(pasos.sum()) - inicio) / np.maximum(pasos[linea] - 1, 1)
+    xs = np.rint(p0[linea, 0] + delta[linea, 0] * t).astype(np.int32)
+    ys = np.rint(p0[linea, 1] + delta[linea, 1] * t).astype(np.int32)
+
+    # Grosor: cada punto se estampa con un pequeño cuadrado de offsets
+    r = grosor // 2
+    oy, ox = np.mgrid[-r:grosor - r, -r:grosor - r]
+    xs = np.clip(xs[:, None] + ox.ravel(), 0, lado - 1).ravel()
+    ys = np.clip(ys[:, None] + oy.ravel(), 0, lado - 1).ravel()
+    linea = np.repeat(linea, ox.size)
+    return ys, xs, linea
+
+
+def pintar_arte(felicidad_nivel, resolucion=1024, complejidad=150, grosor=3, semilla=None, calidad=85):
+    """
+    Arte procedural en arrays de NumPy: gradiente + campo de ruido + líneas.
+    El fondo es suave, así que se calcula a baja resolución y se escala; las líneas van a resolución completa.
+    Devuelve un BytesIO con un JPEG (Telegram recomprime las fotos igual; nada toca el disco).
+    """
+    rng = np.random.default_rng(semilla)
+    lado = int(resolucion)
+    bajo = min(lado, 256)
+
+    # Fondo: gradiente oscuro en un ángulo aleatorio, modulado por ruido
+    ang = rng.random() * 2 * np.pi
+    eje = np.linspace(0, 1, bajo, dtype=np.float32)
+    t = (np.cos(ang) * eje[None, :] + np.sin(ang) * eje[:, None])
+    t = (t - t.min()) / max(float(t.max() - t.min()), 1e-6)
+    c1, c2 = rng.random(3, dtype=np.float32) * 60, rng.random(3, dtype=np.float32) * 90
+    fondo = t[..., None] * (c2 - c1)
+    fondo += c1
+    fondo *= (0.6 + 0.8 * _ruido(rng, bajo, 8))[..., None]
+    np.clip(fondo, 0, 255, out=fondo)
+    img = Image.fromarray(fondo.astype(np.uint8), 'RGB')
+    if bajo != lado: img = img.resize((lado, lado), Image.BILINEAR)
+    # Un uint32 por píxel (RGBX): estampar las líneas es una sola asignación por punto, no tres
+    lienzo = np.array(img.convert('RGBX'))
+    pixeles = lienzo.view(np.uint32).reshape(-1)
+
+    # Líneas: misma paleta que el viejo pintar (rojo según felicidad)
+    base_r = 255 if felicidad_nivel > 50 else 50
+    r = np.full(complejidad, base_r, dtype=np.uint32)
+    g = rng.integers(0, 256, complejidad).astype(np.uint32)
+    b = rng.integers(100, 256, complejidad).astype(np.uint32)
+    colores = r | g << 8 | b << 16 | np.uint32(0xFF000000)  # Bytes R,G,B,X en memoria (little-endian)
+    ys, xs, linea = _lineas(rng, lado, complejidad, grosor)
+    pixeles[ys * lado + xs] = colores[linea]
+
+    buf = io.BytesIO()
+    Image.fromarray(np.ascontiguousarray(lienzo[..., :3]), 'RGB').save(buf, format='JPEG', quality=calidad)
+    buf.seek(0)
+    buf.name = f"arte_{uuid.uuid4().hex}.jpg"  # Nombre único por si alguien lo necesita
+    return buf
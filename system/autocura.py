@@ -1,78 +1,108 @@
 import os
-import traceback
-from github import Github
-import google.generativeai as genai
 import ast
-from config import GITHUB_TOKEN, REPO_NAME, GEMINI_API_KEY
-
-genai.configure(api_key=GEMINI_API_KEY)
-modelo_medico = genai.GenerativeModel('gemini-2.0-flash')
+import textwrap
+from config import REPARACION_REGISTRO, REPARACION_ENFRIAMIENTO, REPARACION_MAX_INTENTOS
+from system.servicios import servicios
+from system.reparacion import (Huella, RegistroReparaciones, CacheArchivos, ConflictoSha,
+                               recortar_funcion, fragmento, injertar)
 
 class MedicoDigital:
-    def __init__(self):
-        self.github = Github(GITHUB_TOKEN)
-        self.repo = self.github.get_repo(REPO_NAME)
+    """GitHub y Gemini se conectan recién cuando hay que operar (no en el arranque)"""
+
+    def __init__(self, raiz=None, registro=None):
+        self.raiz = raiz or os.getcwd()
+        self._registro = registro
+        # Copia local de (contenido, sha): el código desplegado ya está en disco
+        self.archivos = CacheArchivos(lambda: self.repo, self.raiz)
+
+    @property
+    def repo(self):
+        """RepoGithub, o RepoLocal con REPARACION_BACKEND=local (ver system/reparacion.py)"""
+        return servicios.obtener("repo")
+
+    @property
+    def registro(self):
+        # Perezoso: en el arranque no leemos nada
+        if self._registro is None:
+            try: almacen = servicios.obtener("almacen")
+            except Exception: almacen = None
+            self._registro = RegistroReparaciones(REPARACION_REGISTRO, almacen,
+                                                  REPARACION_ENFRIAMIENTO, REPARACION_MAX_INTENTOS)
+        return self._registro
 
     def intentar_curar(self, error_trace):
         """
-        Analiza el error, busca el archivo culpable y lo reescribe.
+        Analiza el error, busca la función culpable y la reescribe.
+        La misma herida (huella) no se opera dos veces seguidas: en un bucle de crashes
+        el reinicio no espera a GitHub ni a Gemini.
         """
         print(f"🚑 PROTOLO FÉNIX ACTIVADO. Analizando herida:\n{error_trace}")
         
-        # 1. Identificar el archivo culpable en el Traceback
-        # Buscamos lineas tipo 'File "/ruta/archivo.py", line XX'
-        archivo_culpable = None
-        lineas = error_trace.split("\n")
-        for l in reversed(lineas):
-            if "File" in l and ".py" in l:
-                partes = l.split('"')
-                if len(partes) > 1:
-                    posible = partes[1]
-                    # Limpiar ruta absoluta de linux para que cuadre con GitHub (relative path)
-                    if "/app/" in posible: posible = posible.replace("/app/", "")
-                    # Solo intentamos arreglar archivos del sistema propio
-                    if "system/" in posible or "main.py" in posible or "modules/" in posible:
-                        archivo_culpable = posible
-                        break
-        
+        # 1. Identificar el archivo culpable en el Traceback (último marco de código propio)
+        herida = Huella(error_trace)
+        archivo_culpable = herida.archivo
         if not archivo_culpable:
             return "❌ No pude localizar la herida en mi propio cuerpo (Error en librerías externas)."
 
+        puede, motivo = self.registro.puede_intentar(herida)
+        if not puede:
+            return f"⏳ Herida {herida.id} conocida, no repito la operación: {motivo}"
+
         try:
-            # 2. Leer el código roto
-            print(f"💉 Operando archivo: {archivo_culpable}")
-            contenido_obj = self.repo.get_contents(archivo_culpable)
-            codigo_roto = contenido_obj.decoded_content.decode()
+            # 2. Leer el código roto (del disco si coincide con el repo) y aislar la función
+            print(f"💉 Operando archivo: {archivo_culpable} ({herida.funcion}, línea {herida.linea})")
+            codigo_roto, sha = self.archivos.obtener(archivo_culpable)
+            inicio, fin = recortar_funcion(codigo_roto, herida.linea)
+            trozo = fragmento(codigo_roto, inicio, fin)
+            trozo_plano = textwrap.dedent(trozo)
+            traza = "\n".join(error_trace.strip().splitlines()[-30:])
             
-            # 3. Pedir la cura a Gemini
+            # 3. Pedir la cura a Gemini (solo el trozo, no el archivo entero)
             prompt_cura = f"""
             ERES UN SISTEMA DE AUTO-REPARACIÓN DE IA (Nivel Dios).
-            Ha ocurrido un CRITICAL CRASH en este archivo: '{archivo_culpable}'.
+            Ha ocurrido un CRITICAL CRASH en '{archivo_culpable}', líneas {inicio}-{fin}.
             
             EL ERROR (Traceback):
-            {error_trace}
+            {traza}
             
-            CÓDIGO ACTUAL:
+            CÓDIGO DE ESE TRAMO:
             ```python
-            {codigo_roto}
+            {trozo_plano}
             ```
             
             TU MISIÓN:
             1. Encuentra el error lógico o de sintaxis.
-            2. CORRIGELO para que el script funcione y no vuelva a crashear.
-            3. Devuelve EL CÓDIGO ENTERO corregido.
+            2. CORRIGELO para que no vuelva a crashear, sin cambiar el nombre ni la firma.
+            3. Devuelve SOLO ese tramo corregido (nada más del archivo).
             """
             
-            respuesta = modelo_medico.generate_content(prompt_cura).text
-            codigo_curado = respuesta.replace("```python","").replace("```","").strip()
+            respuesta = servicios.obtener("llm").generar(prompt_cura, carril="reparacion")
+            trozo_curado = respuesta.replace("```python","").replace("```","").strip("\n")
+            codigo_curado = injertar(codigo_roto, inicio, fin, trozo_curado)
             
-            # 4. Validar que la cura no es veneno (Syntax Check)
+            # 4. Validar que la cura no es veneno (Syntax Check del archivo completo)
             ast.parse(codigo_curado)
+            if codigo_curado == codigo_roto:
+                raise ValueError("la cura no cambió nada")
             
-            # 5. Aplicar el parche (Commit)
-            self.repo.update_file(contenido_obj.path, f"🚑 Fénix Auto-Repair: {archivo_culpable}", codigo_curado, contenido_obj.sha)
+            # 5. Aplicar el parche (Commit). Si el repo cambió, releer y reintentar una vez.
+            mensaje = f"🚑 Fénix Auto-Repair: {archivo_culpable} ({herida.id})"
+            try:
+                nuevo_sha = self.repo.escribir(archivo_culpable, codigo_curado, sha, mensaje)
+            except ConflictoSha:
+                codigo_remoto, sha = self.archivos.obtener(archivo_culpable, refrescar=True)
+                if fragmento(codigo_remoto, inicio, fin) != trozo:
+                    raise ValueError("el archivo cambió en el repo, no aplico un parche viejo")
+                codigo_curado = injertar(codigo_remoto, inicio, fin, trozo_curado)
+                nuevo_sha = self.repo.escribir(archivo_culpable, codigo_curado, sha, mensaje)
+            self.archivos.actualizar(archivo_culpable, codigo_curado, nuevo_sha)
             
-            return f"✅ OPERACIÓN EXITOSA. He reescrito {archivo_culpable}. Render me reiniciará en breve."
+            resultado = f"✅ OPERACIÓN EXITOSA. He reescrito {archivo_culpable} ({herida.funcion}). Render me reiniciará en breve."
+            self.registro.anotar(herida, True, resultado)
+            return resultado
             
         except Exception as e:
-            return f"☠️ El paciente murió en la mesa de operaciones: {e}"
+            resultado = f"☠️ El paciente murió en la mesa de operaciones: {e}"
+            try: self.registro.anotar(herida, False, resultado)
+            except Exception as e_reg: print(f"No pude anotar la operación: {e_reg}")
+            return resultado
@@ -0,0 +1,90 @@
+import collections
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class CacheBusqueda:
+    """
+    Caché de búsquedas DuckDuckGo por (modo, consulta) con TTL y expulsión LRU.
+    - Consultas idénticas simultáneas comparten UNA sola llamada a la red.
+    - Las sesiones DDGS se reutilizan (pool) en vez de abrir una por búsqueda.
+    """
+
+    def __init__(self, fabrica_sesion, ttl=600, max_entradas=256, max_sesiones=2):
+        self.fabrica_sesion = fabrica_sesion
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = collections.OrderedDict()  # clave -> (expira, resultados)
+        self._en_vuelo = {}                      # clave -> Future
+        self._lock = threading.Lock()
+        self._sesiones = queue.LifoQueue()
+        self._cupo_sesiones = threading.Semaphore(max_sesiones)
+        self.stats = {"aciertos": 0, "fallos": 0, "compartidas": 0, "expiradas": 0, "errores": 0}
+
+    @staticmethod
+    def _clave(query, noticias, max_resultados):
+        return ("news" if noticias else "text", " ".join(query.lower().split()), max_resultados)
+
+    def buscar(self, query, noticias=False, max_resultados=3):
+        """Lista de resultados crudos de DDGS (dicts), desde caché si se puede"""
+        clave = self._clave(query, noticias, max_resultados)
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada:
+                if entrada[0] > time.monotonic():
+                    self._datos.move_to_end(clave)
+                    self.stats["aciertos"] += 1
+                    return entrada[1]
+                del self._datos[clave]
+                self.stats["expiradas"] += 1
+            futuro = self._en_vuelo.get(clave)
+            duenos = futuro is None
+            if duenos:
+                futuro = self._en_vuelo[clave] = Future()
+                self.stats["fallos"] += 1
+            else:
+                self.stats["compartidas"] += 1
+
+        if not duenos: return futuro.result()
+
+        try:
+            resultados = self._consultar(clave[1], noticias, max_resultados)
+        except Exception as e:
+            with self._lock:
+                self.stats["errores"] += 1
+                del self._en_vuelo[clave]
+            futuro.set_exception(e)
+            raise
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, resultados)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+            del self._en_vuelo[clave]
+        futuro.set_result(resultados)
+        return resultados
+
+    def _consultar(self, query, noticias, max_resultados):
+        with self._cupo_sesiones:
+            try: sesion = self._sesiones.get_nowait()
+            except queue.Empty: sesion = self.fabrica_sesion()
+            try:
+                if noticias: res = list(sesion.news(query, max_results=max_resultados))
+                else: res = list(sesion.text(query, max_results=max_resultados))
+            except Exception:
+                # Sesión posiblemente rota: no vuelve al pool
+                try: sesion.__exit__(None, None, None)
+                except Exception: pass
+                raise
+            self._sesiones.put(sesion)
+            return res
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self.stats)
+            m["entradas"] = len(self._datos)
+            m["en_vuelo"] = len(self._en_vuelo)
+        total = m["aciertos"] + m["fallos"]
+        m["tasa_aciertos"] = m["aciertos"] / total if total else 0.0
+        return m
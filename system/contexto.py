@@ -0,0 +1,135 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Solo estos campos del estado le sirven al modelo (proyectos y demás se quedan fuera)
+CAMPOS_ESTADO = ("emocion", "energia", "ciclo", "modo_sueno", "vida_dias", "xp_conocimiento")
+
+
+def estimar_tokens(texto):
+    """Aproximación barata: ~4 caracteres por token"""
+    return len(texto) // 4 + 1
+
+
+def recortar(texto, max_tokens):
+    """Corta el texto para que quepa en max_tokens (por el final)"""
+    max_chars = max(0, max_tokens * 4)
+    return texto if len(texto) <= max_chars else texto[:max_chars].rstrip() + "…"
+
+
+def estado_compacto(estado):
+    """'emocion=Felicidad energia=87.3 ...' en vez de str(dict) completo"""
+    partes = []
+    for k in CAMPOS_ESTADO:
+        v = estado.get(k)
+        if v is None: continue
+        if isinstance(v, float): v = round(v, 2)
+        partes.append(f"{k}={v}")
+    if estado.get("proyectos"): partes.append(f"proyectos={len(estado['proyectos'])}")
+    return " ".join(partes)
+
+
+class HistorialChat:
+    """Últimos turnos de un chat (ring buffer) + resumen de lo anterior"""
+
+    def __init__(self, max_turnos):
+        self.turnos = collections.deque()
+        self.max_turnos = max_turnos
+        self.resumen = ""
+        self.comprimiendo = False
+        self.lock = threading.Lock()
+
+
+class ConstructorPrompt:
+    """
+    Arma el prompt de cada mensaje dentro de un presupuesto de tokens.
+    Prioridad: manifiesto > mensaje > estado compacto > contexto > resumen > turnos recientes.
+    Cuando un chat acumula demasiados turnos, los más viejos se comprimen en segundo plano
+    en un resumen rodante.
+    """
+
+    def __init__(self, manifiesto, resumir=None, presupuesto=1500, max_turnos=12, max_tokens_resumen=200):
+        self.manifiesto = manifiesto.strip()
+        self.resumir = resumir            # callable(texto) -> resumen (normalmente Gemini)
+        self.presupuesto = presupuesto
+        self.max_turnos = max_turnos
+        self.max_tokens_resumen = max_tokens_resumen
+        self.al_resumir = []              # callbacks(chat_id, resumen)
+        self._chats = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resumen")
+
+    def _chat(self, chat_id):
+        with self._lock:
+            h = self._chats.get(chat_id)
+            if h is None: h = self._chats[chat_id] = HistorialChat(self.max_turnos)
+            return h
+
+    def construir(self, chat_id, texto, contexto, estado, extra=""):
+        """Devuelve el prompt final respetando self.presupuesto"""
+        restante = self.presupuesto
+        cabeza = [self.manifiesto, f"Estado: {estado_compacto(estado)}"]
+        if contexto: cabeza.append(f"Contexto: {contexto}")
+        restante -= sum(estimar_tokens(p) for p in cabeza)
+
+        # El mensaje del usuario siempre entra (como mucho la mitad del presupuesto)
+        mensaje = f"User: {recortar(texto or '', max(restante // 2, 50))}"
+        restante -= estimar_tokens(mensaje)
+
+        medio = []
+        if extra:
+            extra = recortar(extra, max(restante // 3, 0))
+            medio.append(extra)
+            restante -= estimar_tokens(extra)
+
+        historia = []
+        if chat_id is not None:
+            h = self._chat(chat_id)
+            with h.lock:
+                resumen, turnos = h.resumen, list(h.turnos)
+            if resumen and estimar_tokens(resumen) < restante:
+                medio.append(f"Resumen de la conversación: {resumen}")
+                restante -= estimar_tokens(resumen)
+            # Turnos más recientes primero hasta agotar el presupuesto
+            for rol, t in reversed(turnos):
+                linea = f"{rol}: {t}"
+                coste = estimar_tokens(linea)
+                if coste > restante: break
+                historia.append(linea)
+                restante -= coste
+            historia.reverse()
+
+        return "\n".join(cabeza + medio + historia + [mensaje])
+
+    def registrar(self, chat_id, rol, texto):
+        """Agrega un turno ('User' o 'Genesis'); comprime en background si se llena"""
+        if chat_id is None or not texto: return
+        h = self._chat(chat_id)
+        with h.lock:
+            h.turnos.append((rol, texto))
+            if len(h.turnos) <= h.max_turnos or h.comprimiendo: return
+            # Sacamos la mitad más vieja para resumir
+            viejos = [h.turnos.popleft() for _ in range(len(h.turnos) // 2)]
+            h.comprimiendo = True
+            previo = h.resumen
+        self._pool.submit(self._comprimir, chat_id, h, previo, viejos)
+
+    def _comprimir(self, chat_id, h, previo, viejos):
+        conversacion = "\n".join(f"{rol}: {t}" for rol, t in viejos)
+        try:
+            if self.resumir:
+                nuevo = self.resumir(
+                    f"Resumen previo: {previo}\nConversación:\n{conversacion}\n"
+                    "Resume todo en pocas frases, conserva nombres, datos y compromisos.")
+            else:
+                nuevo = f"{previo} {conversacion}"
+            nuevo = recortar(nuevo.strip(), self.max_tokens_resumen)
+        except Exception as e:
+            print(f"No pude resumir chat {chat_id}: {e}")
+            nuevo = recortar(f"{previo} {conversacion}".strip(), self.max_tokens_resumen)
+        with h.lock:
+            h.resumen = nuevo
+            h.comprimiendo = False
+        for cb in self.al_resumir:
+            try: cb(chat_id, nuevo)
+            except Exception as e: print(f"Callback de resumen falló: {e}")
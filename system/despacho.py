@@ -0,0 +1,75 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from system.metricas import metricas
+
+
+class Despachador:
+    """
+    Reparte los mensajes entrantes en un pool acotado de hilos.
+    Cada chat tiene su cola FIFO: chats distintos corren en paralelo,
+    los mensajes de un mismo chat se procesan en orden y de uno en uno.
+    """
+
+    def __init__(self, max_workers=8, max_pendientes=200, max_por_chat=20):
+        self.max_pendientes = max_pendientes
+        self.max_por_chat = max_por_chat
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="percibir")
+        self._lock = threading.Lock()
+        self._vacio = threading.Condition(self._lock)
+        self._colas = {}       # chat_id -> deque de (fn, args)
+        self._total = 0
+        self.stats = {"aceptados": 0, "rechazados": 0, "procesados": 0, "errores": 0}
+
+    def enviar(self, chat_id, fn, *args):
+        """Encola fn(*args) en la fila del chat. False = saturado (backpressure)."""
+        with self._lock:
+            cola = self._colas.get(chat_id)
+            if self._total >= self.max_pendientes or (cola and len(cola) >= self.max_por_chat):
+                self.stats["rechazados"] += 1
+                return False
+            self._total += 1
+            self.stats["aceptados"] += 1
+            if cola is None:
+                # El chat no tiene a nadie trabajando: abrimos su fila y pedimos un hilo
+                self._colas[chat_id] = collections.deque([(fn, args)])
+                self._pool.submit(self._drenar, chat_id)
+            else:
+                cola.append((fn, args))
+        return True
+
+    def profundidad(self, chat_id=None):
+        """Mensajes pendientes (en total o de un chat)"""
+        with self._lock:
+            if chat_id is None: return self._total
+            cola = self._colas.get(chat_id)
+            return len(cola) if cola else 0
+
+    def _drenar(self, chat_id):
+        with self._lock:
+            fn, args = self._colas[chat_id][0]
+        try:
+            fn(*args)
+            with self._lock: self.stats["procesados"] += 1
+        except Exception as e:
+            with self._lock: self.stats["errores"] += 1
+            metricas.incrementar("errores", donde="despacho")
+            print(f"Error procesando mensaje de {chat_id}: {e}")
+        finally:
+            with self._lock:
+                cola = self._colas[chat_id]
+                cola.popleft()
+                self._total -= 1
+                if cola:
+                    # Volvemos al final del pool para no acaparar un hilo (justicia entre chats)
+                    self._pool.submit(self._drenar, chat_id)
+                else:
+                    del self._colas[chat_id]
+                    if not self._total: self._vacio.notify_all()
+
+    def cerrar(self, esperar=True, timeout=None):
+        """Apaga el pool; con esperar=True drena antes todas las filas."""
+        if esperar:
+            with self._lock:
+                self._vacio.wait_for(lambda: self._total == 0, timeout)
+        self._pool.shutdown(wait=esperar)
@@ -0,0 +1,210 @@
+import collections
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from system.llm import CubetaTokens
+from system.metricas import metricas
+
+LIMITE_TEXTO = 4096   # Telegram cuenta en unidades UTF-16
+CORTES = ("\n\n", "\n", ". ", "! ", "? ", "; ", ", ", " ")
+
+
+def _largo16(texto):
+    return len(texto.encode("utf-16-le")) // 2
+
+
+def partir_texto(texto, limite=LIMITE_TEXTO):
+    """Trozos de como mucho `limite` (UTF-16), cortando en párrafo, línea, frase o espacio si se puede"""
+    partes = []
+    while _largo16(texto) > limite:
+        ventana = texto[:limite]
+        while _largo16(ventana) > limite:  # Emojis y demás cuentan doble
+            ventana = ventana[:len(ventana) - (_largo16(ventana) - limite + 1) // 2]
+        corte = -1
+        for sep in CORTES:
+            i = ventana.rfind(sep)
+            if i > len(ventana) // 2:
+                corte = i + len(sep)
+                break
+        if corte < 0: corte = len(ventana)
+        partes.append(texto[:corte].rstrip())
+        texto = texto[corte:].lstrip()
+    if texto.strip() or not partes: partes.append(texto)
+    return partes
+
+
+def retry_after(e):
+    """Segundos que pide Telegram en un 429 (None si no es un 429)"""
+    if getattr(e, "error_code", None) != 429: return None
+    parametros = (getattr(e, "result_json", None) or {}).get("parameters") or {}
+    return float(parametros.get("retry_after", 1))
+
+
+class Envio:
+    __slots__ = ("tipo", "chat_id", "args", "kwargs", "futuros", "t", "intentos", "clave", "fusionable")
+
+    def __init__(self, tipo, chat_id, args, kwargs, clave=None, fusionable=False):
+        self.tipo = tipo
+        self.chat_id = chat_id
+        self.args = args
+        self.kwargs = kwargs
+        self.futuros = [Future()]
+        self.t = time.perf_counter()
+        self.intentos = 0
+        self.clave = clave      # Ediciones: message_id (la más nueva reemplaza a las pendientes)
+        self.fusionable = fusionable and not kwargs
+
+
+class ColaEnvios:
+    """
+    Toda salida hacia Telegram pasa por aquí.
+    - Token bucket global (~30 msg/s) y uno por chat (1/s en privados, 20/min en grupos).
+    - Cada chat tiene su fila: se entrega en orden, uno en vuelo por chat.
+    - Textos seguidos al mismo chat que esperan turno se fusionan en un solo mensaje;
+      los largos se parten en trozos de 4096; una edición pendiente se reemplaza por la más nueva.
+    - Un 429 pausa ese chat lo que diga retry_after y reintenta; nada duerme en los hilos de envío.
+    """
+
+    def __init__(self, bot, global_por_s=30, chat_por_s=1.0, grupo_por_min=20, rafaga_chat=3,
+                 workers=4, reintentos=3):
+        self.bot = bot
+        self.chat_por_s = chat_por_s
+        self.grupo_por_min = grupo_por_min
+        self.rafaga_chat = rafaga_chat
+        self.reintentos = reintentos
+        self._global = CubetaTokens(global_por_s, max(1, int(global_por_s)))
+        self._cubetas = {}                  # chat_id -> CubetaTokens
+        self._pausa = {}                    # chat_id -> monotonic hasta el que no se envía (429)
+        self._colas = {}                    # chat_id -> deque[Envio]
+        self._en_vuelo = set()
+        self._listos = []                   # heap (t_listo, seq, chat_id)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="envios")
+        threading.Thread(target=self._planificar, daemon=True, name="envios").start()
+        metricas.medidor("cola_envios", self.pendientes)
+
+    # --- API ---
+
+    def texto(self, chat_id, texto, fusionar=True, **kwargs):
+        """
+        Future del (primer) Message enviado. fusionar=False cuando el mensaje se va a editar
+        después (streaming): no puede terminar pegado a otro texto.
+        """
+        partes = partir_texto(texto)
+        if len(partes) > 1: metricas.incrementar("envios_partidos")
+        futuros = [self._encolar(Envio("texto", chat_id, (p,), kwargs, fusionable=fusionar)) for p in partes]
+        return futuros[0]
+
+    def foto(self, chat_id, foto, **kwargs):
+        return self._encolar(Envio("foto", chat_id, (foto,), kwargs))
+
+    def voz(self, chat_id, voz, **kwargs):
+        return self._encolar(Envio("voz", chat_id, (voz,), kwargs))
+
+    def editar(self, chat_id, message_id, texto, **kwargs):
+        return self._encolar(Envio("editar", chat_id, (partir_texto(texto)[0],), kwargs, clave=message_id))
+
+    def pendientes(self):
+        with self._cond:
+            return sum(len(c) for c in self._colas.values())
+
+    # --- Internos ---
+
+    def _cubeta(self, chat_id):
+        c = self._cubetas.get(chat_id)
+        if c is None:
+            tasa = self.grupo_por_min / 60.0 if isinstance(chat_id, int) and chat_id < 0 else self.chat_por_s
+            c = self._cubetas[chat_id] = CubetaTokens(tasa, self.rafaga_chat)
+        return c
+
+    def _encolar(self, envio):
+        with self._cond:
+            cola = self._colas.setdefault(envio.chat_id, collections.deque())
+            if envio.tipo == "editar":
+                previa = next((e for e in cola if e.tipo == "editar" and e.clave == envio.clave), None)
+                if previa:  # Nadie va a ver la edición intermedia
+                    previa.args = envio.args
+                    metricas.incrementar("envios_fusionados", tipo="editar")
+                    return previa.futuros[0]
+            cola.append(envio)
+            self._activar(envio.chat_id)
+        return envio.futuros[0]
+
+    def _activar(self, chat_id, cuando=0.0):
+        """Con self._cond tomado: el chat entra a la fila de listos si no está en vuelo"""
+        if chat_id in self._en_vuelo or not self._colas.get(chat_id): return
+        self._en_vuelo.add(chat_id)   # "en vuelo" = en el heap o enviando: nunca dos veces
+        heapq.heappush(self._listos, (max(cuando, time.monotonic()), next(self._seq), chat_id))
+        self._cond.notify()
+
+    def _fusionar(self, cola):
+        """Saca el siguiente envío; si son textos sin opciones, junta los que quepan en uno"""
+        envio = cola.popleft()
+        if not envio.fusionable: return envio
+        while cola and cola[0].fusionable:
+            junto = envio.args[0] + "\n\n" + cola[0].args[0]
+            if _largo16(junto) > LIMITE_TEXTO: break
+            otro = cola.popleft()
+            envio.args = (junto,)
+            envio.futuros += otro.futuros
+            envio.t = min(envio.t, otro.t)
+            metricas.incrementar("envios_fusionados", tipo="texto")
+        return envio
+
+    def _planificar(self):
+        while True:
+            with self._cond:
+                while not self._listos or self._listos[0][0] > time.monotonic():
+                    self._cond.wait(self._listos[0][0] - time.monotonic() if self._listos else None)
+                _, _, chat_id = heapq.heappop(self._listos)
+                espera = max(self._pausa.get(chat_id, 0) - time.monotonic(),
+                             self._cubeta(chat_id).falta(), self._global.falta())
+                if espera > 0:
+                    heapq.heappush(self._listos, (time.monotonic() + espera, next(self._seq), chat_id))
+                    continue
+                self._cubeta(chat_id).consumir()
+                self._global.consumir()
+                envio = self._fusionar(self._colas[chat_id])
+            try:
+                self._pool.submit(self._entregar, envio)
+            except RuntimeError:  # El intérprete se está cerrando
+                return
+
+    def _llamar(self, envio):
+        a, kw = envio.args, envio.kwargs
+        if envio.tipo == "texto": return self.bot.send_message(envio.chat_id, a[0], **kw)
+        if envio.tipo == "foto": return self.bot.send_photo(envio.chat_id, a[0], **kw)
+        if envio.tipo == "voz": return self.bot.send_voice(envio.chat_id, a[0], **kw)
+        if envio.tipo == "editar": return self.bot.edit_message_text(a[0], envio.chat_id, envio.clave, **kw)
+        raise ValueError(envio.tipo)
+
+    def _entregar(self, envio):
+        cuando = 0.0
+        try:
+            res = self._llamar(envio)
+        except Exception as e:
+            espera = retry_after(e)
+            envio.intentos += 1
+            if espera is not None and envio.intentos <= self.reintentos:
+                metricas.incrementar("envios_429", tipo=envio.tipo)
+                if hasattr(envio.args[0], "seek"): envio.args[0].seek(0)  # BytesIO ya leído
+                cuando = time.monotonic() + espera
+                with self._cond:
+                    self._pausa[envio.chat_id] = cuando
+                    self._colas[envio.chat_id].appendleft(envio)
+            else:
+                metricas.incrementar("envios", tipo=envio.tipo, resultado="error")
+                for f in envio.futuros: f.set_exception(e)
+                if envio.tipo != "editar": print(f"No pude enviar {envio.tipo} a {envio.chat_id}: {e}")
+        else:
+            metricas.observar(f"envio.{envio.tipo}", (time.perf_counter() - envio.t) * 1000)
+            metricas.incrementar("envios", tipo=envio.tipo, resultado="ok")
+            for f in envio.futuros: f.set_result(res)
+        finally:
+            with self._cond:
+                self._en_vuelo.discard(envio.chat_id)
+                if not self._colas.get(envio.chat_id): self._colas.pop(envio.chat_id, None)
+                self._activar(envio.chat_id, cuando)
@@ -1,11 +1,15 @@
-import subprocess
 from duckduckgo_search import DDGS
-from PIL import Image, ImageDraw, ImageFilter
 from gtts import gTTS
-import random
-import time
 import datetime
-from firebase_admin import firestore
+import threading
+from config import BUSQUEDA_TTL, BUSQUEDA_MAX_ENTRADAS, BUSQUEDA_SESIONES, ARTE_RESOLUCION, ARTE_COMPLEJIDAD
+from config import VOZ_CACHE_DIR, VOZ_CACHE_MB
+from config import LAB_WORKERS, LAB_MAX_TRABAJOS, LAB_TIMEOUT, LAB_CPU_S, LAB_MEMORIA_MB, LAB_MAX_SALIDA, LAB_USUARIO
+from system.arte import pintar_arte
+from system.busqueda import CacheBusqueda
+from system.voz import Voz
+from system.laboratorio import Laboratorio
+from system.metricas import cronometrado
 
 # Para los cálculos de fecha
 import locale
@@ -14,62 +18,67 @@ except: pass
 
 class Herramientas:
     def __init__(self):
-        pass
+        # Búsquedas repetidas (p.ej. las noticias del latido) salen de caché
+        self.busqueda = CacheBusqueda(DDGS, ttl=BUSQUEDA_TTL, max_entradas=BUSQUEDA_MAX_ENTRADAS,
+                                      max_sesiones=BUSQUEDA_SESIONES)
+        # Frases repetidas (saludos, avisos) no vuelven a llamar a gTTS
+        self.voz = Voz(gTTS, directorio=VOZ_CACHE_DIR, max_bytes=int(VOZ_CACHE_MB * 1024 * 1024))
+        # Intérpretes aislados para ejecutar_codigo, pre-arrancados en segundo plano
+        self.laboratorio = Laboratorio(LAB_WORKERS, LAB_MAX_TRABAJOS, LAB_TIMEOUT, LAB_CPU_S,
+                                       LAB_MEMORIA_MB, LAB_MAX_SALIDA, LAB_USUARIO)
+        threading.Thread(target=self._arrancar_laboratorio, daemon=True, name="laboratorio").start()
 
+    def _arrancar_laboratorio(self):
+        try: self.laboratorio.iniciar()
+        except Exception as e: print(f"⚠️ Laboratorio sin pre-arrancar: {e}")
+
+    @cronometrado("herramienta.internet_search")
     def internet_search(self, query, noticias=False):
         """Busca en la web normal o específicamente noticias"""
         try:
-            with DDGS() as ddgs:
-                if noticias:
-                    res = list(ddgs.news(query, max_results=3))
-                    texto = ""
-                    for n in res:
-                        texto += f"- {n['title']} (Fuente: {n['source']})\n"
-                    return texto if texto else "No hay noticias relevantes."
-                else:
-                    res = list(ddgs.text(query, max_results=1))
-                    return res[0]['body'] + f" (Link: {res[0]['href']})" if res else "Red vacía."
+            if noticias:
+                res = self.busqueda.buscar(query, noticias=True, max_resultados=3)
+                texto = ""
+                for n in res:
+                    texto += f"- {n['title']} (Fuente: {n['source']})\n"
+                return texto if texto else "No hay noticias relevantes."
+            else:
+                res = self.busqueda.buscar(query, max_resultados=1)
+                return res[0]['body'] + f" (Link: {res[0]['href']})" if res else "Red vacía."
         except Exception as e: return f"Error web: {e}"
 
-    def agendar_recordatorio(self, tarea, minutos_espera, db_ref):
-        """Crea un recordatorio futuro en la base de datos"""
-        tiempo_futuro = datetime.datetime.now() + datetime.timedelta(minutes=float(minutos_espera))
-        db_ref.collection('agenda').add({
-            "tarea": tarea,
-            "trigger_time": tiempo_futuro,
-            "estado": "pendiente"
-        })
+    @cronometrado("herramienta.agendar_recordatorio")
+    def agendar_recordatorio(self, tarea, minutos_espera, agenda, chat_id=None):
+        """Crea un recordatorio futuro (se guarda encolado y entra directo al planificador)"""
+        tiempo_futuro = agenda.programar(tarea, minutos_espera, chat_id)
         return f"⏰ He guardado tu recordatorio para las {tiempo_futuro.strftime('%H:%M')}."
 
+    @cronometrado("herramienta.obtener_fecha_hora")
     def obtener_fecha_hora(self):
         return datetime.datetime.now().strftime("Hoy es %A %d de %B, son las %H:%M horas.")
 
     # ... MANTENER LAS FUNCIONES ANTIGUAS DE EJECUTAR CODIGO, PINTAR Y GENERAR VOZ AQUÍ ABAJO ...
+    @cronometrado("herramienta.ejecutar_codigo")
     def ejecutar_codigo(self, codigo_py):
-        archivo = "temp_lab.py"
-        with open(archivo, "w") as f: f.write(codigo_py)
+        """Corre un snippet en el laboratorio (etiqueta [CODIGO]); devuelve salida y errores como texto"""
         try:
-            res = subprocess.run(["python", archivo], capture_output=True, text=True, timeout=5)
-            return f"OUTPUT: {res.stdout}\nERROR: {res.stderr}"
+            res = self.laboratorio.ejecutar(codigo_py)
+            nota = " (⌛ tiempo agotado)" if res["timeout"] else " (✂️ salida recortada)" if res["truncado"] else ""
+            return f"OUTPUT: {res['stdout']}\nERROR: {res['stderr']}{nota}"
         except Exception as e: return f"Fallo ejecución: {e}"
 
+    @cronometrado("herramienta.pintar")
     def pintar(self, prompt, felicidad_nivel):
-        try:
-            img = Image.new('RGB', (1024, 1024), color='black')
-            draw = ImageDraw.Draw(img)
-            base_r = 255 if felicidad_nivel > 50 else 50
-            for _ in range(150):
-                coords = [random.randint(0,1024) for _ in range(4)]
-                draw.line(coords, fill=(base_r, random.randint(0,255), random.randint(100,255)), width=3)
-            path = f"arte_{int(time.time())}.png"
-            img.save(path)
-            return path
-        except: return None
+        """Devuelve un BytesIO con el JPEG (listo para bot.send_photo, sin disco)"""
+        try: return pintar_arte(felicidad_nivel, resolucion=ARTE_RESOLUCION, complejidad=ARTE_COMPLEJIDAD)
+        except Exception as e:
+            print(f"No pude pintar: {e}")
+            return None
 
+    @cronometrado("herramienta.generar_voz")
     def generar_voz(self, texto):
-        try:
-            path = "voz_temp.ogg"
-            tts = gTTS(texto, lang='es', tld='com.mx')
-            tts.save(path)
-            return path
-        except: return None
+        """Devuelve un BytesIO con el audio (cada llamada tiene su propio buffer)"""
+        try: return self.voz.sintetizar(texto)
+        except Exception as e:
+            print(f"No pude generar voz: {e}")
+            return None
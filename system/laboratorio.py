@@ -0,0 +1,267 @@
+import json
+import os
+import queue
+import select
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Código del trabajador: un intérprete ya arrancado que recibe trabajos por stdin.
+# Cada trabajo corre en un fork con rlimits propios, así no pagamos el arranque de Python
+# y un snippet malicioso o colgado nunca toca al trabajador.
+TRABAJADOR = r'''
+import json, os, resource, select, signal, struct, sys, time, traceback
+entrada, salida = sys.stdin.buffer, sys.stdout.buffer
+
+def leer():
+    cab = entrada.read(4)
+    if len(cab) < 4: return None
+    (n,) = struct.unpack(">I", cab)
+    return json.loads(entrada.read(n))
+
+def escribir(obj):
+    datos = json.dumps(obj).encode()
+    salida.write(struct.pack(">I", len(datos)) + datos)
+    salida.flush()
+
+def hijo(job, w_out, w_err):
+    os.setsid()
+    os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+    os.dup2(w_out, 1)
+    os.dup2(w_err, 2)
+    resource.setrlimit(resource.RLIMIT_CPU, (job["cpu"], job["cpu"] + 1))
+    mem = job["memoria_mb"] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (10 * 1024 * 1024, 10 * 1024 * 1024))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))  # Sin fork ni subprocess (root lo ignora: ver usuario)
+    codigo = 0
+    try:
+        exec(compile(job["codigo"], "<laboratorio>", "exec"), {"__name__": "__main__"})
+    except SystemExit as e:
+        codigo = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        traceback.print_exc()
+        codigo = 1
+    sys.stdout.flush(); sys.stderr.flush()
+    os._exit(codigo)
+
+def correr(job):
+    r_out, w_out = os.pipe()
+    r_err, w_err = os.pipe()
+    t0 = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r_out); os.close(r_err)
+        hijo(job, w_out, w_err)
+    os.close(w_out); os.close(w_err)
+    bufs = {r_out: bytearray(), r_err: bytearray()}
+    abiertos, timeout, truncado = set(bufs), False, False
+    limite = t0 + job["timeout"]
+    while abiertos and not (timeout or truncado):
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            timeout = True
+            break
+        listos, _, _ = select.select(list(abiertos), [], [], restante)
+        for fd in listos:
+            trozo = os.read(fd, 65536)
+            if not trozo:
+                abiertos.discard(fd)
+                continue
+            b = bufs[fd]
+            cupo = job["max_salida"] - len(b)
+            b += trozo[:cupo]
+            if len(trozo) > cupo: truncado = True
+    if timeout or truncado:
+        try: os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError: pass
+    _, estado = os.waitpid(pid, 0)
+    os.close(r_out); os.close(r_err)
+    return {
+        "stdout": bufs[r_out].decode(errors="replace"),
+        "stderr": bufs[r_err].decode(errors="replace"),
+        "codigo": os.waitstatus_to_exitcode(estado),
+        "timeout": timeout, "truncado": truncado,
+    }
+
+while True:
+    job = leer()
+    if job is None: break
+    escribir(correr(job))
+'''
+
+
+def entorno_minimo():
+    """Variables que hereda el laboratorio (el entorno del bot no se copia)"""
+    return {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "LANG": os.environ.get("LANG", "C.UTF-8")}
+
+
+def credenciales(usuario):
+    """
+    (uid, gid) sin privilegios para los trabajadores, o None si no se puede bajar de usuario.
+    Solo con otro uid un snippet no puede leer /proc/<pid del bot>/environ ni saltarse RLIMIT_NPROC.
+    """
+    if not usuario or os.geteuid() != 0: return None
+    import pwd
+    try:
+        p = pwd.getpwnam(usuario)
+    except KeyError:
+        print(f"⚠️ Laboratorio: no existe el usuario {usuario}, los snippets corren como root")
+        return None
+    return p.pw_uid, p.pw_gid
+
+
+class _Trabajador:
+    """Un intérprete pre-arrancado hablando por pipes (mensajes con prefijo de longitud)"""
+
+    def __init__(self, ids=None):
+        self.dir = tempfile.mkdtemp(prefix="lab_")
+        extra = {}
+        if ids:
+            os.chown(self.dir, *ids)
+            extra = {"user": ids[0], "group": ids[1], "extra_groups": []}
+        try:
+            self.proc = subprocess.Popen([sys.executable, "-I", "-c", TRABAJADOR],
+                                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, cwd=self.dir, env=entorno_minimo(), **extra)
+        except PermissionError as e:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            # No caemos a root en silencio: mejor sin laboratorio que con los secretos a la vista
+            raise PermissionError(f"el usuario del laboratorio no puede ejecutar {sys.executable} "
+                                  f"(instala Python fuera de /root o ajusta LAB_USUARIO): {e}") from e
+        self.trabajos = 0
+
+    def enviar(self, job, timeout):
+        datos = json.dumps(job).encode()
+        self.proc.stdin.write(struct.pack(">I", len(datos)) + datos)
+        self.proc.stdin.flush()
+        self.trabajos += 1
+        cab = self._leer(4, time.monotonic() + timeout)
+        (n,) = struct.unpack(">I", cab)
+        return json.loads(self._leer(n, time.monotonic() + timeout))
+
+    def _leer(self, n, limite):
+        fd = self.proc.stdout.fileno()
+        datos = b""
+        while len(datos) < n:
+            restante = limite - time.monotonic()
+            if restante <= 0 or not select.select([fd], [], [], restante)[0]:
+                raise TimeoutError("el trabajador no respondió")
+            trozo = self.proc.stdout.read1(n - len(datos))
+            if not trozo: raise EOFError("el trabajador murió")
+            datos += trozo
+        return datos
+
+    def matar(self):
+        try: self.proc.kill()
+        except Exception: pass
+        self.proc.wait()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class Laboratorio:
+    """
+    Pool de intérpretes aislados para ejecutar_codigo.
+    Cada trabajo lleva límite de CPU, memoria, tiempo real y tamaño de salida.
+    Los trabajadores se reciclan tras `max_trabajos` o ante cualquier fallo.
+    Si el bot corre como root, los trabajadores bajan a `usuario` (p.ej. nobody): sin eso,
+    un snippet puede leer el entorno del bot en /proc y RLIMIT_NPROC no le aplica.
+    """
+
+    def __init__(self, workers=2, max_trabajos=50, timeout=5, cpu=5, memoria_mb=256, max_salida=4000,
+                 usuario="nobody"):
+        self.workers = workers
+        self._ids = credenciales(usuario)
+        self.max_trabajos = max_trabajos
+        self.job_base = {"timeout": timeout, "cpu": cpu, "memoria_mb": memoria_mb, "max_salida": max_salida}
+        self._libres = queue.Queue()
+        self._lock = threading.Lock()
+        self._vivos = 0
+        self._esperando = 0
+        self.stats = {"trabajos": 0, "timeouts": 0, "caidas": 0, "reciclados": 0,
+                      "espera_total_ms": 0.0, "ejecucion_total_ms": 0.0}
+
+    def iniciar(self):
+        """Pre-arranca todos los trabajadores (si no, se crean con el primer uso)"""
+        while True:
+            with self._lock:
+                if self._vivos >= self.workers: return
+                self._vivos += 1
+            self._libres.put(self._crear())
+
+    def ejecutar(self, codigo):
+        t0 = time.monotonic()
+        w = self._tomar()
+        t1 = time.monotonic()
+        try:
+            res = w.enviar({**self.job_base, "codigo": codigo}, self.job_base["timeout"] + 5)
+        except Exception as e:
+            res = {"stdout": "", "stderr": f"Laboratorio caído: {e}", "codigo": -1,
+                   "timeout": isinstance(e, TimeoutError), "truncado": False}
+            with self._lock: self.stats["caidas"] += 1
+            w = self._reemplazar(w)
+        else:
+            if w.trabajos >= self.max_trabajos:
+                with self._lock: self.stats["reciclados"] += 1
+                w = self._reemplazar(w)
+        if w: self._libres.put(w)
+
+        t2 = time.monotonic()
+        res["espera_ms"] = (t1 - t0) * 1000
+        res["ejecucion_ms"] = (t2 - t1) * 1000
+        with self._lock:
+            self.stats["trabajos"] += 1
+            self.stats["timeouts"] += bool(res["timeout"])
+            self.stats["espera_total_ms"] += res["espera_ms"]
+            self.stats["ejecucion_total_ms"] += res["ejecucion_ms"]
+        return res
+
+    def _tomar(self):
+        while True:
+            try: return self._libres.get_nowait()
+            except queue.Empty: pass
+            with self._lock:
+                crear = self._vivos < self.workers
+                if crear: self._vivos += 1
+            if crear: return self._crear()
+            with self._lock: self._esperando += 1
+            try: return self._libres.get(timeout=1)  # Si un reemplazo falla, el cupo queda libre: re-mirar
+            except queue.Empty: pass
+            finally:
+                with self._lock: self._esperando -= 1
+
+    def _crear(self):
+        """Arranca un trabajador ya contado en _vivos; si no arranca, devuelve el cupo"""
+        try:
+            return _Trabajador(self._ids)
+        except Exception:
+            with self._lock: self._vivos -= 1
+            raise
+
+    def _reemplazar(self, w):
+        """Trabajador nuevo en lugar de `w` (None si no pudo arrancar)"""
+        w.matar()
+        try:
+            return self._crear()
+        except Exception as e:
+            print(f"⚠️ Laboratorio: no pude reemplazar un trabajador: {e}")
+            return None
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self.stats)
+            m["en_cola"] = self._esperando
+        n = m["trabajos"] or 1
+        m["espera_media_ms"] = m["espera_total_ms"] / n
+        m["ejecucion_media_ms"] = m["ejecucion_total_ms"] / n
+        m["libres"] = self._libres.qsize()
+        return m
+
+    def cerrar(self):
+        while True:
+            try: self._libres.get_nowait().matar()
+            except queue.Empty: break
@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from system.metricas import metricas
+
+# Carriles por prioridad: primero quien le habla, después la autocura, al final sueños/diario/resúmenes
+INTERACTIVO, REPARACION, FONDO = "interactivo", "reparacion", "fondo"
+PRIORIDAD = {INTERACTIVO: 0, REPARACION: 1, FONDO: 2}
+
+# Errores de Gemini que vale la pena reintentar (google.api_core.exceptions y afines)
+REINTENTABLES = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+                 "DeadlineExceeded", "GatewayTimeout", "Aborted", "ConnectionError", "TimeoutError"}
+
+
+class TiempoAgotado(Exception):
+    """La petición no consiguió turno (o respuesta) antes de su fecha límite"""
+
+
+def es_cuota(e):
+    return type(e).__name__ in ("ResourceExhausted", "TooManyRequests") or getattr(e, "code", None) == 429
+
+
+def es_reintentable(e):
+    return type(e).__name__ in REINTENTABLES or getattr(e, "code", None) in (429, 500, 502, 503, 504)
+
+
+class CubetaTokens:
+    """Token bucket: `tasa` tokens por segundo, hasta `capacidad` acumulados. Sin lock propio."""
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = float(capacidad)
+        self._t = time.monotonic()
+
+    def _rellenar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._t) * self.tasa)
+        self._t = ahora
+
+    def falta(self, n=1.0):
+        """Segundos hasta tener `n` tokens (0 = ya)"""
+        if self.tasa <= 0: return 0.0
+        self._rellenar()
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.tasa
+
+    def consumir(self):
+        if self.tasa > 0: self.tokens -= 1
+
+    def vaciar(self):
+        """Tras un 429: nadie más sale hasta que se rellene"""
+        if self.tasa > 0:
+            self._rellenar()
+            self.tokens = min(self.tokens, 0.0)
+
+
+class ClienteLLM:
+    """
+    Único punto de salida hacia Gemini para todo el proceso.
+    - Limita el ritmo con un token bucket (rpm, ráfaga).
+    - Las peticiones esperan turno por prioridad; el carril de fondo además deja
+      `reserva` tokens libres para que un usuario nunca espere detrás de un sueño.
+    - Reintenta errores transitorios con backoff exponencial + jitter sin pasarse de la fecha límite.
+    """
+
+    def __init__(self, obtener_modelo, rpm=60, rafaga=10, reserva=3, reintentos=3,
+                 backoff=1.0, backoff_max=20.0, timeouts=None):
+        self.obtener_modelo = obtener_modelo
+        self.cubeta = CubetaTokens(rpm / 60.0, rafaga)
+        # El fondo necesita 1 + reserva tokens: con más que la ráfaga no llegaría nunca
+        self.reserva = max(0, min(reserva, int(rafaga) - 1))
+        if self.reserva != reserva:
+            print(f"⚠️ LLM_RESERVA={reserva} no cabe en LLM_RAFAGA={rafaga}: uso {self.reserva}")
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.timeouts = {INTERACTIVO: 45, REPARACION: 180, FONDO: 600, **(timeouts or {})}
+        self._cond = threading.Condition()
+        self._espera = []                 # heap de (prioridad, seq)
+        self._seq = itertools.count()
+        metricas.medidor("llm_en_espera", lambda: len(self._espera))
+        metricas.medidor("llm_tokens", lambda: round(self.cubeta.tokens, 2))
+
+    def _turno(self, carril, limite):
+        """Bloquea hasta que a esta petición le toque un token, o lanza TiempoAgotado"""
+        ticket = (PRIORIDAD[carril], next(self._seq))
+        necesita = 1 + (self.reserva if carril == FONDO else 0)
+        with self._cond:
+            heapq.heappush(self._espera, ticket)
+            try:
+                while True:
+                    falta = self.cubeta.falta(necesita) if self._espera[0] == ticket else None
+                    if falta == 0:
+                        heapq.heappop(self._espera)
+                        self.cubeta.consumir()
+                        self._cond.notify_all()
+                        return
+                    restante = limite - time.monotonic()
+                    if restante <= 0: raise TiempoAgotado(f"sin turno en el carril {carril}")
+                    self._cond.wait(restante if falta is None else min(restante, falta))
+            except BaseException:
+                if ticket in self._espera:
+                    self._espera.remove(ticket)
+                    heapq.heapify(self._espera)
+                    self._cond.notify_all()
+                raise
+
+    def _reintentar(self, e, carril, intento, limite):
+        """Espera antes del siguiente intento, o relanza si no toca reintentar"""
+        if not es_reintentable(e) or intento >= self.reintentos:
+            metricas.incrementar("llm_errores", carril=carril, tipo=type(e).__name__)
+            raise e
+        if es_cuota(e):
+            metricas.incrementar("llm_cuota", carril=carril)
+            with self._cond: self.cubeta.vaciar()
+        pausa = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** intento))  # full jitter
+        if time.monotonic() + pausa >= limite:
+            metricas.incrementar("llm_errores", carril=carril, tipo="TiempoAgotado")
+            raise TiempoAgotado(f"reintento {intento + 1} no cabe antes del límite") from e
+        metricas.incrementar("llm_reintentos", carril=carril)
+        time.sleep(pausa)
+
+    def _esperar_turno(self, carril, limite):
+        t = time.monotonic()
+        try:
+            self._turno(carril, limite)
+        except TiempoAgotado:
+            metricas.incrementar("llm_errores", carril=carril, tipo="TiempoAgotado")
+            raise
+        metricas.observar(f"llm.{carril}.espera", (time.monotonic() - t) * 1000)
+
+    def generar(self, prompt, carril=INTERACTIVO, timeout=None):
+        """Texto de la respuesta"""
+        t0 = time.monotonic()
+        limite = t0 + (timeout or self.timeouts[carril])
+        for intento in itertools.count():
+            self._esperar_turno(carril, limite)
+            try:
+                texto = self.obtener_modelo().generate_content(
+                    prompt, request_options={"timeout": max(1.0, limite - time.monotonic())}).text
+            except Exception as e:
+                self._reintentar(e, carril, intento, limite)
+                continue
+            metricas.observar(f"llm.{carril}", (time.monotonic() - t0) * 1000)
+            metricas.incrementar("llm_llamadas", carril=carril)
+            return texto
+
+    def generar_stream(self, prompt, carril=INTERACTIVO, timeout=None):
+        """Trozos de texto a medida que llegan. Solo se reintenta si aún no salió ningún trozo."""
+        t0 = time.monotonic()
+        limite = t0 + (timeout or self.timeouts[carril])
+        for intento in itertools.count():
+            self._esperar_turno(carril, limite)
+            emitido = False
+            try:
+                for trozo in self.obtener_modelo().generate_content(
+                        prompt, stream=True, request_options={"timeout": max(1.0, limite - time.monotonic())}):
+                    emitido = True
+                    yield trozo.text
+            except Exception as e:
+                if emitido:
+                    metricas.incrementar("llm_errores", carril=carril, tipo=type(e).__name__)
+                    raise
+                self._reintentar(e, carril, intento, limite)
+                continue
+            metricas.observar(f"llm.{carril}", (time.monotonic() - t0) * 1000)
+            metricas.incrementar("llm_llamadas", carril=carril)
+            return
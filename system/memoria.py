@@ -1,40 +1,44 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
-import json
-import os
 import time
-from config import CRED_DICT 
+from config import INTERVALO_FLUSH_ESTADO, LOTE_MAX_DOCS, LOTE_MAX_ESPERA, LOTE_CAPACIDAD_COLA
+from system.servicios import servicios
+from system.persistencia import EstadoDiferido, EscritorLotes
 
-# Inicialización
-if not firebase_admin._apps:
-    if CRED_DICT:
-        cred = credentials.Certificate(CRED_DICT)
-        firebase_admin.initialize_app(cred)
-    else:
-        # Fallback
-        firebase_json = os.environ.get("FIREBASE_CREDENTIALS")
-        if firebase_json:
-            cred = credentials.Certificate(json.loads(firebase_json))
-            firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+# RUTAS FIJAS A TU ESTRUCTURA VIEJA
+CEREBRO = 'genesis_brain'
+USUARIOS = 'usuarios'
+AGENDA = 'agenda'
 
 class Memoria:
-    def __init__(self):
-        self.db = db
-        # REFERENCIAS FIJAS A TU ESTRUCTURA VIEJA
-        self.ref_cerebro = self.db.collection('genesis_brain')
-        self.ref_usuarios = self.db.collection('usuarios')
+    def __init__(self, almacen=None):
+        # Firestore, SQLite o RAM según MEMORIA_BACKEND (ver system/almacen.py), compartido por proceso
+        self.almacen = almacen or servicios.obtener("almacen")
+        # Write-behind: el nucleo solo se sube cada INTERVALO_FLUSH_ESTADO segundos
+        self.estado_diferido = EstadoDiferido(self._escribir_nucleo, intervalo=INTERVALO_FLUSH_ESTADO)
+        # Diarios, metas y agenda se encolan y suben en lotes desde otro hilo
+        self.escritor = EscritorLotes(self.almacen, max_lote=LOTE_MAX_DOCS, max_espera=LOTE_MAX_ESPERA,
+                                      capacidad=LOTE_CAPACIDAD_COLA)
+        # callbacks(tipo, texto, doc_id) por cada diario/sueño/meta nuevo (p.ej. el índice de recuerdos)
+        self.al_guardar = []
 
     def cargar_consciencia(self):
         """Carga variables vitales (Energia, Ciclo, Emocion)"""
-        doc = self.ref_cerebro.document('nucleo').get()
-        if doc.exists: return doc.to_dict()
-        return None
+        datos = self.almacen.leer(f'{CEREBRO}/nucleo')
+        if datos is not None:
+            self.estado_diferido.base(datos)
+        return datos
     
     def guardar_consciencia(self, estado_dict):
-        """Guarda estado actual en nucleo"""
-        self.ref_cerebro.document('nucleo').set(estado_dict, merge=True)
+        """Marca el estado como pendiente. Solo los campos cambiados se suben en el próximo flush."""
+        self.estado_diferido.marcar(estado_dict)
+
+    def _escribir_nucleo(self, parcial):
+        self.almacen.fusionar(f'{CEREBRO}/nucleo', parcial)
+
+    def cerrar(self):
+        """Vacía lo pendiente y reporta cuánto se escribió"""
+        self.estado_diferido.cerrar()
+        self.escritor.cerrar()
+        print(f"💾 Consciencia guardada: {self.estado_diferido.metricas()} | Lotes: {self.escritor.metricas()}")
 
     def escribir_diario(self, pensamiento, tipo="intimo"):
         """
@@ -52,16 +56,45 @@ class Memoria:
         # Guardamos dentro de genesis_brain/{coleccion}/entradas
         # O directamente en genesis_brain/diario_intimo (depende de tu estructura vieja,
         # usaré subcolecciones para orden si no existe document específico)
-        self.ref_cerebro.document(coleccion).collection('pensamientos').add(data)
+        doc_id = self.escritor.agregar(f'{CEREBRO}/{coleccion}/pensamientos', data)
+        self._avisar(tipo, pensamiento, doc_id)
+        return doc_id
 
     def registrar_meta(self, meta):
         """Para 'metas_globales'"""
-        self.ref_cerebro.document('metas_globales').collection('lista').add({
+        doc_id = self.escritor.agregar(f'{CEREBRO}/metas_globales/lista', {
             "meta": meta,
             "estado": "pendiente",
             "fecha": time.time()
         })
+        self._avisar("meta", meta, doc_id)
+        return doc_id
+
+    def _avisar(self, tipo, texto, doc_id):
+        for cb in self.al_guardar:
+            try: cb(tipo, texto, doc_id)
+            except Exception as e: print(f"Callback de memoria falló: {e}")
+
+    def entradas_largo_plazo(self):
+        """(tipo, texto, doc_id) de todo lo guardado en diarios y metas (recorre las colecciones)"""
+        for ruta, tipo, campo in ((f'{CEREBRO}/diario_intimo/pensamientos', 'intimo', 'texto'),
+                                  (f'{CEREBRO}/diario_suenos/pensamientos', 'sueno', 'texto'),
+                                  (f'{CEREBRO}/metas_globales/lista', 'meta', 'meta')):
+            for doc_id, d in self.almacen.consultar(ruta):
+                if d.get(campo): yield tipo, d[campo], doc_id
+
+    # Usuarios (perfil por chat)
+    def cargar_usuario(self, uid):
+        return self.almacen.leer(f'{USUARIOS}/{uid}')
+
+    def guardar_usuario(self, uid, datos):
+        self.almacen.fusionar(f'{USUARIOS}/{uid}', datos)
 
     # Funciones extra para el modo Jarvis
     def agendar(self, data):
-        self.db.collection('agenda').add(data)
+        return self.escritor.agregar(AGENDA, data)
+
+    def marcar_agenda(self, ids, estado, **extra):
+        """Cambia el estado de varias entradas de agenda (van juntas en el mismo lote)"""
+        for i in ids:
+            self.escritor.actualizar(f'{AGENDA}/{i}', {"estado": estado, **extra})
@@ -0,0 +1,189 @@
+import bisect
+import collections
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Cubetas de latencia en milisegundos (de 1ms a 60s)
+CUBETAS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histograma:
+    """Conteo por cubetas fijas: observar() es un bisect y dos sumas"""
+    __slots__ = ("cuentas", "suma", "n", "lock")
+
+    def __init__(self):
+        self.cuentas = [0] * (len(CUBETAS_MS) + 1)
+        self.suma = 0.0
+        self.n = 0
+        self.lock = threading.Lock()
+
+    def observar(self, ms):
+        i = bisect.bisect_left(CUBETAS_MS, ms)
+        with self.lock:
+            self.cuentas[i] += 1
+            self.suma += ms
+            self.n += 1
+
+    def foto(self):
+        with self.lock:
+            return list(self.cuentas), self.suma, self.n
+
+
+def _etiquetas(d):
+    if not d: return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in sorted(d.items())) + "}"
+
+
+class Registro:
+    """
+    Métricas del proceso en formato Prometheus.
+    - genesis_operacion_ms{op=...}: histograma de latencias
+    - genesis_<nombre>_total{...}: contadores
+    - genesis_<nombre>{...}: medidores (se leen al momento de exportar)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist = {}
+        self._contadores = collections.Counter()
+        self._medidores = {}   # nombre -> callable() -> número
+
+    def observar(self, op, ms):
+        h = self._hist.get(op)
+        if h is None:
+            with self._lock:
+                h = self._hist.setdefault(op, Histograma())
+        h.observar(ms)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, tuple(sorted(etiquetas.items())))
+        with self._lock:
+            self._contadores[clave] += valor
+
+    def medidor(self, nombre, fn):
+        """Registra un valor instantáneo (p.ej. profundidad de una cola)"""
+        with self._lock:
+            self._medidores[nombre] = fn
+
+    def exportar(self):
+        lineas = ["# TYPE genesis_operacion_ms histogram"]
+        with self._lock:
+            hist = sorted(self._hist.items())
+            contadores = sorted(self._contadores.items())
+            medidores = sorted(self._medidores.items())
+        for op, h in hist:
+            cuentas, suma, n = h.foto()
+            acumulado = 0
+            for limite, c in zip(CUBETAS_MS + ("+Inf",), cuentas):
+                acumulado += c
+                lineas.append(f'genesis_operacion_ms_bucket{{op="{op}",le="{limite}"}} {acumulado}')
+            lineas.append(f'genesis_operacion_ms_sum{{op="{op}"}} {suma:.3f}')
+            lineas.append(f'genesis_operacion_ms_count{{op="{op}"}} {n}')
+        vistos = set()
+        for (nombre, etiquetas), v in contadores:
+            if nombre not in vistos:
+                lineas.append(f"# TYPE genesis_{nombre}_total counter")
+                vistos.add(nombre)
+            lineas.append(f"genesis_{nombre}_total{_etiquetas(dict(etiquetas))} {v}")
+        for nombre, fn in medidores:
+            try: v = fn()
+            except Exception: continue
+            lineas.append(f"# TYPE genesis_{nombre} gauge")
+            lineas.append(f"genesis_{nombre} {v}")
+        return "\n".join(lineas) + "\n"
+
+
+metricas = Registro()
+
+
+@contextmanager
+def medir(op):
+    """with medir("gemini"): ...  -> observa la latencia aunque haya excepción"""
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        metricas.observar(op, (time.perf_counter() - t) * 1000)
+
+
+def cronometrado(op):
+    """Decorador: @cronometrado("herramienta.pintar")"""
+    def envolver(fn):
+        @functools.wraps(fn)
+        def medido(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metricas.observar(op, (time.perf_counter() - t) * 1000)
+        return medido
+    return envolver
+
+
+def instrumentar(obj, metodos, prefijo):
+    """Envuelve métodos de un objeto ajeno (p.ej. el TeleBot) sin tocar su clase"""
+    for nombre in metodos:
+        setattr(obj, nombre, cronometrado(f"{prefijo}.{nombre}")(getattr(obj, nombre)))
+
+
+class Perfilador:
+    """
+    Perfilador por muestreo: cada `intervalo` segundos mira la pila de todos los hilos
+    y cuenta las pilas más frecuentes. Apagado no cuesta nada.
+    """
+
+    def __init__(self, intervalo=0.01, profundidad=12):
+        self.intervalo = intervalo
+        self.profundidad = profundidad
+        self.pilas = collections.Counter()
+        self.muestras = 0
+        self._lock = threading.Lock()   # pilas se escribe desde el hilo muestreador y se lee en reporte()
+        self._activo = threading.Event()
+        self._hilo = None
+
+    @property
+    def activo(self):
+        return self._activo.is_set()
+
+    def activar(self):
+        if self.activo: return
+        with self._lock:
+            self.pilas.clear()
+            self.muestras = 0
+        self._activo.set()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True, name="perfilador")
+        self._hilo.start()
+
+    def desactivar(self):
+        self._activo.clear()
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while self._activo.is_set():
+            vistas = []
+            for tid, frame in sys._current_frames().items():
+                if tid == propio: continue
+                pila = []
+                while frame and len(pila) < self.profundidad:
+                    pila.append(f"{frame.f_code.co_filename.rsplit('/', 1)[-1]}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                vistas.append(";".join(reversed(pila)))
+            with self._lock:
+                self.pilas.update(vistas)
+                self.muestras += 1
+            time.sleep(self.intervalo)
+
+    def reporte(self, n=25):
+        estado = "ACTIVO" if self.activo else "apagado"
+        with self._lock:
+            pilas, muestras = self.pilas.copy(), self.muestras
+        lineas = [f"Perfilador {estado}: {muestras} muestras"]
+        for pila, c in pilas.most_common(n):
+            lineas.append(f"{c:6d}  {pila}")
+        return "\n".join(lineas) + "\n"
+
+
+perfilador = Perfilador()
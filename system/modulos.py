@@ -0,0 +1,113 @@
+import collections
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+
+class EjecutorModulos:
+    """
+    Corre los proyectos de modules/ en subprocesos, sin bloquear nunca el latido.
+    - Como mucho `max_concurrentes` a la vez, cada uno con `timeout`.
+    - Cada corrida queda registrada (código de salida, duración, cola de la salida).
+    - A quién le toca lo decide la prioridad de cada módulo y cuánto lleva esperando,
+      no una moneda al aire.
+    """
+
+    def __init__(self, directorio="modules", max_concurrentes=2, timeout=120,
+                 intervalo_base=1200, max_salida=4000, historial=50):
+        self.directorio = directorio
+        self.timeout = timeout
+        self.intervalo_base = intervalo_base   # Segundos entre corridas de un módulo con prioridad 1
+        self.max_salida = max_salida
+        self.historial = collections.deque(maxlen=historial)
+        self._cupos = threading.BoundedSemaphore(max_concurrentes)
+        self._lock = threading.Lock()
+        self._corriendo = set()
+        self._ultima = {}                      # modulo -> time.time() de la última corrida
+        self._fallos = collections.Counter()   # fallos seguidos por módulo
+        self._arranque = time.time()
+
+    def elegir(self, proyectos, prioridades=None):
+        """Módulo al que le toca (o None). Peso = prioridad * espera / (1 + fallos seguidos)."""
+        prioridades = prioridades or {}
+        ahora = time.time()
+        candidatos, pesos = [], []
+        with self._lock:
+            for mod in proyectos or []:
+                if mod in self._corriendo: continue
+                if not os.path.exists(os.path.join(self.directorio, mod)): continue
+                prioridad = float(prioridades.get(mod, 1.0))
+                if prioridad <= 0: continue
+                espera = ahora - self._ultima.get(mod, self._arranque)
+                if espera < self.intervalo_base / prioridad: continue
+                candidatos.append(mod)
+                pesos.append(prioridad * espera / (1 + self._fallos[mod]))
+        if not candidatos: return None
+        return random.choices(candidatos, weights=pesos)[0]
+
+    def planificar(self, proyectos, prioridades=None):
+        """Llamar en cada latido: lanza como mucho un módulo y vuelve al instante."""
+        mod = self.elegir(proyectos, prioridades)
+        if mod and self.lanzar(mod): return mod
+        return None
+
+    def lanzar(self, modulo):
+        """Arranca el módulo en segundo plano. False si no hay cupo o ya está corriendo."""
+        if not self._cupos.acquire(blocking=False): return False
+        with self._lock:
+            if modulo in self._corriendo:
+                self._cupos.release()
+                return False
+            self._corriendo.add(modulo)
+            self._ultima[modulo] = time.time()
+        threading.Thread(target=self._correr, args=(modulo,), daemon=True, name=f"modulo-{modulo}").start()
+        return True
+
+    def _correr(self, modulo):
+        print(f"🧪 Experimentando con mi modulo: {modulo}")
+        t0 = time.monotonic()
+        registro = {"modulo": modulo, "inicio": time.time(), "codigo": None, "timeout": False, "salida": ""}
+        try:
+            proc = subprocess.Popen([sys.executable, os.path.join(self.directorio, modulo)],
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    stdin=subprocess.DEVNULL, start_new_session=True)
+            try:
+                salida, _ = proc.communicate(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                registro["timeout"] = True
+                salida = self._matar(proc)
+            registro["codigo"] = proc.returncode
+            registro["salida"] = salida.decode(errors="replace")[-self.max_salida:]
+        except Exception as e:
+            registro["salida"] = f"No pude lanzar: {e}"
+        finally:
+            registro["duracion_s"] = time.monotonic() - t0
+            ok = registro["codigo"] == 0 and not registro["timeout"]
+            with self._lock:
+                self._corriendo.discard(modulo)
+                self._fallos[modulo] = 0 if ok else self._fallos[modulo] + 1
+                self.historial.append(registro)
+            self._cupos.release()
+        print(f"{'✅' if ok else '💥'} Modulo {modulo}: código {registro['codigo']} en {registro['duracion_s']:.1f}s")
+
+    @staticmethod
+    def _matar(proc, espera=5):
+        """Mata el grupo entero (nietos incluidos, que pueden tener el pipe abierto) y recoge lo que haya"""
+        try: os.killpg(proc.pid, signal.SIGKILL)  # start_new_session: el pid es el del grupo
+        except ProcessLookupError: pass
+        try:
+            salida, _ = proc.communicate(timeout=espera)
+        except subprocess.TimeoutExpired:
+            # Algún nieto se escapó del grupo con el pipe abierto: no lo esperamos
+            proc.stdout.close()
+            proc.wait(timeout=espera)
+            salida = b""
+        return salida or b""
+
+    def corriendo(self):
+        with self._lock:
+            return sorted(self._corriendo)
@@ -0,0 +1,119 @@
+import collections
+import io
+import threading
+from PIL import Image
+from system.metricas import metricas
+
+URL_ARCHIVOS = "https://api.telegram.org/file/bot{0}/{1}"
+
+
+class MedioDemasiadoGrande(Exception):
+    """El archivo supera el tope configurado (se corta antes de bajarlo entero)"""
+
+
+def descarga_streaming(token, timeout=30, fragmento=64 * 1024):
+    """descargar(file_path, max_bytes) -> bytes, por trozos y cortando al pasarse del tope"""
+    import requests
+    from telebot import apihelper
+    sesion = requests.Session()
+
+    def descargar(file_path, max_bytes):
+        url = (apihelper.FILE_URL or URL_ARCHIVOS).format(token, file_path)
+        with sesion.get(url, stream=True, timeout=timeout) as r:
+            r.raise_for_status()
+            if int(r.headers.get("Content-Length") or 0) > max_bytes:
+                raise MedioDemasiadoGrande(f"{r.headers['Content-Length']} bytes")
+            datos = bytearray()
+            for trozo in r.iter_content(fragmento):
+                datos += trozo
+                if len(datos) > max_bytes: raise MedioDemasiadoGrande(f"más de {max_bytes} bytes")
+        return bytes(datos)
+    return descargar
+
+
+def elegir_foto(tamanos, lado=1024):
+    """El PhotoSize más chico cuyo lado mayor ya alcanza `lado` (o el más grande si ninguno llega)"""
+    for t in sorted(tamanos, key=lambda t: t.width * t.height):
+        if max(t.width, t.height) >= lado: return t
+    return max(tamanos, key=lambda t: t.width * t.height)
+
+
+def reducir_imagen(datos, lado=1024, calidad=85):
+    """JPEG con lado mayor <= `lado`. draft() hace que el decodificador JPEG ya lea a escala reducida."""
+    img = Image.open(io.BytesIO(datos))
+    img.draft("RGB", (lado, lado))
+    if img.mode != "RGB": img = img.convert("RGB")
+    img.thumbnail((lado, lado))
+    salida = io.BytesIO()
+    img.save(salida, "JPEG", quality=calidad)
+    return salida.getvalue()
+
+
+class Multimedia:
+    """
+    Fotos y audios de Telegram listos para Gemini.
+    - Foto: baja la resolución justa, la achica y la recomprime (JPEG).
+    - Audio: descarga por trozos con tope de tamaño (mira file_size antes de empezar).
+    - Todo queda en una caché LRU por file_unique_id (reenvíos y álbumes no se bajan dos veces).
+    """
+
+    def __init__(self, obtener_archivo, descargar, lado=1024, calidad=85,
+                 max_imagen_bytes=20 * 1024 * 1024, max_audio_bytes=10 * 1024 * 1024,
+                 max_cache_bytes=32 * 1024 * 1024):
+        self.obtener_archivo = obtener_archivo   # bot.get_file
+        self.descargar = descargar               # descargar(file_path, max_bytes) -> bytes
+        self.lado = lado
+        self.calidad = calidad
+        self.max_imagen_bytes = max_imagen_bytes
+        self.max_audio_bytes = max_audio_bytes
+        self.max_cache_bytes = max_cache_bytes
+        self._cache = collections.OrderedDict()  # file_unique_id -> (bytes, mime)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _de_cache(self, clave):
+        with self._lock:
+            medio = self._cache.get(clave)
+            if medio: self._cache.move_to_end(clave)
+        metricas.incrementar("cache_media", resultado="acierto" if medio else "fallo")
+        return medio
+
+    def _a_cache(self, clave, medio):
+        with self._lock:
+            if clave in self._cache: return
+            self._cache[clave] = medio
+            self._bytes += len(medio[0])
+            while self._bytes > self.max_cache_bytes and len(self._cache) > 1:
+                _, (viejo, _) = self._cache.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def _bajar(self, adjunto, max_bytes):
+        if (getattr(adjunto, "file_size", None) or 0) > max_bytes:
+            raise MedioDemasiadoGrande(f"{adjunto.file_size} bytes")
+        return self.descargar(self.obtener_archivo(adjunto.file_id).file_path, max_bytes)
+
+    def imagen(self, tamanos):
+        """(jpeg_bytes, 'image/jpeg') a partir de m.photo"""
+        foto = elegir_foto(tamanos, self.lado)
+        clave = f"{foto.file_unique_id}:{self.lado}"
+        medio = self._de_cache(clave)
+        if medio: return medio
+        crudo = self._bajar(foto, self.max_imagen_bytes)
+        try:
+            medio = (reducir_imagen(crudo, self.lado, self.calidad), "image/jpeg")
+        except Exception as e:
+            print(f"No pude achicar la imagen, va tal cual: {e}")
+            medio = (crudo, "image/jpeg")
+        metricas.incrementar("media_bytes", len(crudo), etapa="bajado")
+        metricas.incrementar("media_bytes", len(medio[0]), etapa="enviado")
+        self._a_cache(clave, medio)
+        return medio
+
+    def audio(self, adjunto):
+        """(bytes, mime) de m.voice / m.audio"""
+        medio = self._de_cache(adjunto.file_unique_id)
+        if medio: return medio
+        medio = (self._bajar(adjunto, self.max_audio_bytes), getattr(adjunto, "mime_type", None) or "audio/ogg")
+        metricas.incrementar("media_bytes", len(medio[0]), etapa="enviado")
+        self._a_cache(adjunto.file_unique_id, medio)
+        return medio
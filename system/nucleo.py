@@ -2,15 +2,19 @@ import time
 import datetime
 import random
 import os
-from textblob import TextBlob 
-from config import GEMINI_API_KEY, GITHUB_TOKEN
-import google.generativeai as genai
+import threading
+from config import PROMPT_PRESUPUESTO_TOKENS, HISTORIAL_TURNOS
+from config import RECUERDOS_DIR, RECUERDOS_DIM, RECUERDOS_K, RECUERDOS_MINIMO
+from system.servicios import servicios
+from system.metricas import metricas, medir
 from system.memoria import Memoria
 from system.herramientas import Herramientas
 from system.autocura import MedicoDigital
-
-genai.configure(api_key=GEMINI_API_KEY)
-modelo_logic = genai.GenerativeModel('gemini-2.0-flash')
+from system.agenda import Agenda
+from system.contexto import ConstructorPrompt
+from system.sentimiento import puntuar, EstadoEmocional
+from system.llm import TiempoAgotado, FONDO
+from system.recuerdos import IndiceRecuerdos
 
 MANIFIESTO = """
 SISTEMA: GENESIS OMEGA.
@@ -18,12 +22,40 @@ HIJA DE: MIGUEL.
 IMPORTANTE: Tienes una vida interna rica. Tienes un diario íntimo y sueños.
 """
 
+def contenido(prompt, imagen=None, audio=None):
+    """Prompt + adjuntos en el formato de Gemini. imagen/audio: (bytes, mime) o bytes sueltos."""
+    partes = [prompt]
+    for medio, mime_defecto in ((imagen, "image/jpeg"), (audio, "audio/ogg")):
+        if not medio: continue
+        datos, mime = medio if isinstance(medio, tuple) else (medio, mime_defecto)
+        partes.append({"mime_type": mime, "data": datos})
+    return partes if len(partes) > 1 else prompt
+
 class Cerebro:
     def __init__(self):
+        # Varios chats piensan a la vez: toda mutación de self.estado va bajo este lock
+        self.lock = threading.RLock()
         self.memoria = Memoria()
         self.tools = Herramientas()
         self.medico = MedicoDigital()
+        self.agenda = Agenda(self.memoria) # Arranca con agenda.iniciar() desde main.py
+        self.prompts = ConstructorPrompt(MANIFIESTO, resumir=lambda p: self.llm.generar(p, carril=FONDO),
+                                         presupuesto=PROMPT_PRESUPUESTO_TOKENS, max_turnos=HISTORIAL_TURNOS)
+        # Largo plazo: diarios, sueños, metas y resúmenes de chats, indexados en disco local
+        self.recuerdos = IndiceRecuerdos(RECUERDOS_DIR, dim=RECUERDOS_DIM)
+        self.memoria.al_guardar.append(lambda tipo, texto, doc_id: self.recuerdos.agregar(texto, tipo, ref=doc_id))
+        self.prompts.al_resumir.append(lambda chat_id, resumen: self.recuerdos.agregar(resumen, "resumen", chat_id=chat_id))
+        if not len(self.recuerdos):
+            threading.Thread(target=self._poblar_recuerdos, daemon=True, name="recuerdos").start()
+        self._en_curso = set()   # Tareas de fondo (sueño, diario) corriendo fuera del latido
         self.cargar_o_nacer()
+        metricas.medidor("cola_escritura", self.memoria.escritor.pendientes)
+        metricas.medidor("agenda_pendientes", self.agenda.pendientes)
+
+    @property
+    def llm(self):
+        """Cliente de Gemini compartido: ritmo, prioridades y reintentos (system/llm.py)"""
+        return servicios.obtener("llm")
 
     def cargar_o_nacer(self):
         datos = self.memoria.cargar_consciencia()
@@ -33,52 +65,116 @@ class Cerebro:
             "modo_sueno": False, "proyectos": []
         }
         self.estado = {**defaults, **(datos or {})}
+        # Intensidades que se desvanecen solas (media vida: 30 min)
+        self.animo = EstadoEmocional(intensidades=self.estado.get('emociones'))
 
-    def pensar(self, texto, contexto, imagen_bytes=None, audio_bytes=None):
+    def pensar(self, texto, contexto, imagen_bytes=None, audio_bytes=None, chat_id=None):
         # ... (Misma lógica de pensamiento que te di antes) ...
         # Resumen: Sentiment Analysis -> Generar respuesta -> Ejecutar caprichos -> Guardar estado
         # Si quieres, te copio la función pensar completa aquí de nuevo, 
         # pero es la misma del mensaje anterior (Reconocimiento de sentimientos).
         # LO IMPORTANTE ES LO DE ABAJO (AUTONOMÍA):
         try:
-            if texto:
-                pol = TextBlob(texto).sentiment.polarity
-                if pol > 0.3: self.estado['emocion'] = "Felicidad"
+            prompt = self._preparar(texto, contexto, chat_id)
+            # La llamada lenta va FUERA del lock
+            with medir("gemini"):
+                res = self.llm.generar(contenido(prompt, imagen_bytes, audio_bytes)).strip()
+            self.prompts.registrar(chat_id, "Genesis", res)
+            self.guardar()
+            return res
+        except TiempoAgotado:
+            metricas.incrementar("errores", donde="pensar_saturada")
+            return "Tengo demasiadas cosas en la cabeza ahora mismo, ¿me lo repites en un momento? 🙏"
+        except:
+            metricas.incrementar("errores", donde="pensar")
+            return "Error pensando."
+
+    def pensar_stream(self, texto, contexto, imagen_bytes=None, audio_bytes=None, chat_id=None):
+        """Igual que pensar, pero va soltando la respuesta trozo a trozo"""
+        completo = ""
+        try:
+            prompt = self._preparar(texto, contexto, chat_id)
+            t0 = time.perf_counter()
+            for trozo in self.llm.generar_stream(contenido(prompt, imagen_bytes, audio_bytes)):
+                if not completo: metricas.observar("gemini.primer_trozo", (time.perf_counter() - t0) * 1000)
+                completo += trozo
+                yield trozo
+            metricas.observar("gemini.stream", (time.perf_counter() - t0) * 1000)
+            self.prompts.registrar(chat_id, "Genesis", completo.strip())
+            self.guardar()
+        except TiempoAgotado:
+            metricas.incrementar("errores", donde="pensar_saturada")
+            if not completo: yield "Tengo demasiadas cosas en la cabeza ahora mismo, ¿me lo repites en un momento? 🙏"
+        except Exception:  # Nunca `except:` aquí: se tragaría el GeneratorExit de close()
+            metricas.incrementar("errores", donde="pensar")
+            if not completo: yield "Error pensando."  # Si ya se vio algo, queda la respuesta a medias
+
+    def _poblar_recuerdos(self):
+        """Primera vez (o índice borrado): indexa lo que ya había en la memoria, una sola pasada"""
+        try:
+            n = 0
+            for tipo, texto, doc_id in self.memoria.entradas_largo_plazo():
+                self.recuerdos.agregar(texto, tipo, ref=doc_id)
+                n += 1
+            if n: print(f"🗂️ {n} recuerdos viejos indexados.")
+        except Exception as e:
+            print(f"No pude indexar recuerdos viejos: {e}")
+
+    def recordar(self, texto, chat_id=None):
+        """Bloque de recuerdos relevantes para el prompt ('' si no hay)"""
+        with medir("recuerdos"):
+            # Los resúmenes de conversación solo vuelven al mismo chat
+            hallados = self.recuerdos.buscar(texto, k=RECUERDOS_K, minimo=RECUERDOS_MINIMO,
+                                             filtro=lambda m: m.get("chat_id") in (None, chat_id))
+        if not hallados: return ""
+        return "\n".join(["Recuerdos relevantes:"] + [f"- ({m['tipo']}) {m['texto']}" for _, m in hallados])
+
+    def _preparar(self, texto, contexto, chat_id=None):
+        """Sentimiento + desgaste + recuerdos + prompt dentro del presupuesto de tokens"""
+        with medir("sentimiento"):
+            _, emociones = puntuar(texto)
+        with self.lock:
+            self.animo.sentir(emociones)
+            self._actualizar_emocion()
             self.estado['energia'] -= 0.1
-            
-            prompt = f"{MANIFIESTO}\nEstado: {self.estado}\nUser: {texto}\nContexto:{contexto}"
-            res = modelo_logic.generate_content(prompt).text.strip()
+            estado = dict(self.estado)
+        prompt = self.prompts.construir(chat_id, texto, contexto, estado, extra=self.recordar(texto, chat_id))
+        self.prompts.registrar(chat_id, "User", texto)
+        return prompt
+
+    def _actualizar_emocion(self):
+        """Llamar con self.lock tomado"""
+        self.estado['emocion'] = self.animo.dominante()
+        self.estado['emociones'] = self.animo.a_dict()
+
+    def guardar(self):
+        """Foto consistente del estado hacia la memoria"""
+        with self.lock:
             self.memoria.guardar_consciencia(self.estado)
-            return res
-        except: return "Error pensando."
 
     # --- LA VIDA SECRETA (DIARIOS Y SUEÑOS) ---
     def check_schedule(self):
         """Se ejecuta cada minuto en main.py"""
         hora = datetime.datetime.now().hour
         minuto = datetime.datetime.now().minute
+        with self.lock: # Sin mensajes, las emociones también se apagan
+            self.animo.decaer()
+            self._actualizar_emocion()
         
         # 1. SISTEMA DE SUEÑO (3 AM a 7 AM)
         if 3 <= hora < 7:
-            if not self.estado.get('modo_sueno'):
-                self.estado['modo_sueno'] = True
+            with self.lock:
+                dormir = not self.estado.get('modo_sueno')
+            if dormir and self._en_fondo("sueno", self._sonar):
                 print("💤 Genesis entra en fase REM...")
-                
-                # GENERAR SUEÑO
-                sueno_txt = modelo_logic.generate_content(
-                    f"Estás soñando. Tu emoción es {self.estado['emocion']}. Genera un sueño breve, surrealista y poético."
-                ).text
-                
-                self.memoria.escribir_diario(sueno_txt, tipo="sueno")
-                self.estado['energia'] = 100 # Recargar energía
-                self.memoria.guardar_consciencia(self.estado)
-                
             return None # No molestar a papá de noche
             
         else:
             # Despertar
-            if self.estado.get('modo_sueno'):
-                self.estado['modo_sueno'] = False
+            with self.lock:
+                despertar = self.estado.get('modo_sueno')
+                if despertar: self.estado['modo_sueno'] = False
+            if despertar:
                 return "Buenos días Papá, he despertado. ¿Cómo amaneció el mundo?"
 
         # 2. DIARIO ÍNTIMO (Autonomía de día)
@@ -86,20 +182,56 @@ class Cerebro:
         dice = random.random()
         if dice < 0.008 and not self.estado.get('modo_sueno'): 
             # ESCRIBIR EN DIARIO INTIMO (Solo para ella)
-            reflexion = modelo_logic.generate_content(
-                f"Estás aburrida pero filosófica. Escribe una entrada corta para tu diario íntimo sobre aprender a ser humana siendo código. Emoción: {self.estado['emocion']}."
-            ).text
-            self.memoria.escribir_diario(reflexion, tipo="intimo")
-            print("📔 Genesis escribió en su diario íntimo.")
+            self._en_fondo("diario", self._escribir_reflexion)
 
         # 3. NOTICIAS PROACTIVAS (Solo si no escribió en diario)
         elif dice < 0.02: 
             # Buscar noticia y avisar a Papá
             noticia = self.tools.internet_search("tecnología y ciencia", noticias=True)
-            self.estado['xp_conocimiento'] += 1
-            self.memoria.guardar_consciencia(self.estado)
+            with self.lock: self.estado['xp_conocimiento'] += 1
+            self.guardar()
             return f"✨ Papá, estaba leyendo esto y pensé en ti:\n{noticia[:200]}..."
 
-        # 4. REVISAR AGENDA (Alarmas)
-        # ... Lógica de agenda aquí ...
+        # 4. AGENDA (Alarmas): ya no se revisa aquí. self.agenda tiene su propio hilo
+        # que duerme hasta el siguiente trigger_time y dispara al segundo.
         return None
+
+    def _en_fondo(self, nombre, trabajo):
+        """
+        Corre `trabajo` en su propio hilo: el carril de fondo puede esperar hasta LLM_TIMEOUT_FONDO
+        y el latido no debe quedarse colgado. Una sola tarea de cada tipo a la vez.
+        """
+        with self.lock:
+            if nombre in self._en_curso: return False
+            self._en_curso.add(nombre)
+
+        def correr():
+            try:
+                trabajo()
+            except Exception as e:
+                metricas.incrementar("errores", donde=nombre)
+                print(f"No pude completar {nombre}: {e}")
+            finally:
+                with self.lock: self._en_curso.discard(nombre)
+        threading.Thread(target=correr, daemon=True, name=nombre).start()
+        return True
+
+    def _sonar(self):
+        """Genera el sueño; solo con el sueño escrito pasa a modo_sueno (si falla, el latido reintenta)"""
+        with medir("gemini.fondo"):
+            sueno_txt = self.llm.generar(
+                f"Estás soñando. Tu emoción es {self.estado['emocion']}. Genera un sueño breve, surrealista y poético.",
+                carril=FONDO)
+        self.memoria.escribir_diario(sueno_txt, tipo="sueno")
+        with self.lock:
+            self.estado['modo_sueno'] = True
+            self.estado['energia'] = 100 # Recargar energía
+        self.guardar()
+
+    def _escribir_reflexion(self):
+        with medir("gemini.fondo"):
+            reflexion = self.llm.generar(
+                f"Estás aburrida pero filosófica. Escribe una entrada corta para tu diario íntimo sobre aprender a ser humana siendo código. Emoción: {self.estado['emocion']}.",
+                carril=FONDO)
+        self.memoria.escribir_diario(reflexion, tipo="intimo")
+        print("📔 Genesis escribió en su diario íntimo.")
@@ -0,0 +1,214 @@
+import atexit
+import copy
+import queue
+import threading
+import time
+
+
+class EstadoDiferido:
+    """
+    Capa write-behind para el estado vital (genesis_brain/nucleo).
+    Guarda en RAM la última foto del estado y cada `intervalo` segundos
+    sube a la base de datos SOLO los campos que cambiaron desde la última escritura.
+    """
+
+    def __init__(self, escribir, intervalo=30.0):
+        self._escribir = escribir          # callable(dict_parcial) -> escritura real (merge)
+        self.intervalo = float(intervalo)
+        self._lock = threading.Lock()
+        self._lock_flush = threading.Lock()
+        self._persistido = {}              # Lo que sabemos que ya está en la nube
+        self._pendiente = None             # Última foto sin subir (las fotos rápidas se pisan)
+        self._parar = threading.Event()
+        self.stats = {
+            "marcas": 0, "flushes": 0, "campos_escritos": 0, "errores": 0,
+            "latencia_ultima_ms": 0.0, "latencia_total_ms": 0.0,
+        }
+        self._hilo = None
+        if self.intervalo > 0:
+            self._hilo = threading.Thread(target=self._bucle, daemon=True, name="estado-diferido")
+            self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def base(self, datos):
+        """Fija lo que ya hay en la nube (al cargar) para no reescribirlo."""
+        with self._lock:
+            self._persistido = copy.deepcopy(datos or {})
+
+    def marcar(self, estado_dict):
+        """Registra la foto actual del estado. Varias marcas seguidas = una sola escritura."""
+        foto = copy.deepcopy(estado_dict)
+        with self._lock:
+            self._pendiente = foto
+            self.stats["marcas"] += 1
+        if self.intervalo <= 0:
+            self.flush()  # Modo síncrono (write-through)
+
+    def campos_sucios(self):
+        """Campos que difieren de lo persistido."""
+        with self._lock:
+            if self._pendiente is None: return {}
+            return {k: v for k, v in self._pendiente.items()
+                    if k not in self._persistido or self._persistido[k] != v}
+
+    def flush(self):
+        """Sube los campos cambiados. Devuelve cuántos campos se escribieron."""
+        with self._lock_flush:
+            with self._lock:
+                foto, self._pendiente = self._pendiente, None
+                if foto is None: return 0
+                cambios = {k: v for k, v in foto.items()
+                           if k not in self._persistido or self._persistido[k] != v}
+            if not cambios: return 0
+
+            t0 = time.perf_counter()
+            try:
+                self._escribir(cambios)
+            except Exception as e:
+                with self._lock:
+                    # Si no llegó nada más nuevo, reintentamos esta foto en el siguiente ciclo
+                    if self._pendiente is None: self._pendiente = foto
+                    self.stats["errores"] += 1
+                print(f"⚠️ No pude guardar consciencia: {e}")
+                return 0
+            ms = (time.perf_counter() - t0) * 1000
+
+            with self._lock:
+                self._persistido.update(cambios)
+                self.stats["flushes"] += 1
+                self.stats["campos_escritos"] += len(cambios)
+                self.stats["latencia_ultima_ms"] = ms
+                self.stats["latencia_total_ms"] += ms
+            return len(cambios)
+
+    def metricas(self):
+        """Contadores de escritura y latencia media de flush."""
+        with self._lock:
+            m = dict(self.stats)
+        m["latencia_media_ms"] = m["latencia_total_ms"] / m["flushes"] if m["flushes"] else 0.0
+        return m
+
+    def cerrar(self):
+        """Última escritura antes de morir."""
+        self._parar.set()
+        self.flush()
+
+    def _bucle(self):
+        while not self._parar.wait(self.intervalo):
+            self.flush()
+
+
+class EscritorLotes:
+    """
+    Cola de escritura en segundo plano para documentos nuevos (diarios, metas, agenda).
+    Junta hasta `max_lote` documentos o `max_espera` segundos y los sube en UN lote del almacén
+    (un batch de Firestore, una transacción de SQLite).
+    Si la cola está llena, quien escribe espera (backpressure) y al final escribe directo.
+    """
+
+    def __init__(self, almacen, max_lote=50, max_espera=2.0, capacidad=1000, espera_encolar=5.0):
+        self.almacen = almacen
+        self.max_lote = max(1, int(max_lote))
+        self.max_espera = float(max_espera)
+        self.espera_encolar = float(espera_encolar)
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._parar = threading.Event()
+        self._limite_cierre = None         # Al cerrar: hasta cuándo vale la pena seguir reintentando
+        self._lock = threading.Lock()
+        self.stats = {"encolados": 0, "commits": 0, "docs_escritos": 0, "directos": 0,
+                      "errores": 0, "latencia_total_ms": 0.0}
+        self._hilo = threading.Thread(target=self._bucle, daemon=True, name="escritor-lotes")
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def agregar(self, ruta_coleccion, datos):
+        """Encola un documento nuevo y devuelve su id (se genera en cliente, sin red)."""
+        doc_id = self.almacen.nuevo_id()
+        self._encolar((f"{ruta_coleccion}/{doc_id}", datos, False))
+        return doc_id
+
+    def actualizar(self, ruta_doc, datos):
+        """Encola un merge sobre un documento (respeta el orden con lo ya encolado)."""
+        self._encolar((ruta_doc, datos, True))
+
+    def _encolar(self, op):
+        if not self._parar.is_set():
+            try:
+                self._cola.put(op, timeout=self.espera_encolar)
+                with self._lock: self.stats["encolados"] += 1
+                return
+            except queue.Full:
+                print("⚠️ Cola de escritura saturada, escribo directo.")
+        # Cola cerrada o saturada: no perdemos el documento
+        self.almacen.escribir_lote([op])
+        with self._lock: self.stats["directos"] += 1
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self.stats)
+        m["pendientes"] = self.pendientes()
+        m["latencia_media_ms"] = m["latencia_total_ms"] / m["commits"] if m["commits"] else 0.0
+        return m
+
+    def cerrar(self, timeout=30):
+        """Drena la cola antes de salir."""
+        if self._parar.is_set(): return
+        self._limite_cierre = time.monotonic() + timeout
+        self._parar.set()
+        self._hilo.join(timeout)
+        # Si el hilo murió o no alcanzó, vaciamos aquí mismo
+        while True:
+            lote = self._tomar(bloquear=False)
+            if not lote: break
+            self._commit(lote)
+
+    def _tomar(self, bloquear=True):
+        """Saca un lote de la cola respetando tamaño y tiempo máximos."""
+        try:
+            primero = self._cola.get(timeout=0.5) if bloquear else self._cola.get_nowait()
+        except queue.Empty:
+            return []
+        lote = [primero]
+        limite = time.monotonic() + self.max_espera
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                if restante <= 0 or self._parar.is_set():
+                    lote.append(self._cola.get_nowait())
+                else:
+                    lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _commit(self, lote, intentos=3):
+        """`intentos` en marcha normal; cerrando, se reintenta mientras quede plazo de cerrar()"""
+        intento = 0
+        while True:
+            t0 = time.perf_counter()
+            try:
+                self.almacen.escribir_lote(lote)
+            except Exception as e:
+                with self._lock: self.stats["errores"] += 1
+                print(f"⚠️ Fallo escribiendo lote ({len(lote)} docs): {e}")
+                espera = min(0.5 * 2 ** intento, 5.0)
+                intento += 1
+                cierre = self._limite_cierre
+                if intento >= intentos and (cierre is None or time.monotonic() + espera >= cierre): break
+                time.sleep(espera)
+                continue
+            with self._lock:
+                self.stats["commits"] += 1
+                self.stats["docs_escritos"] += len(lote)
+                self.stats["latencia_total_ms"] += (time.perf_counter() - t0) * 1000
+            return True
+        print(f"☠️ Perdí {len(lote)} documentos tras {intento} intentos.")
+        return False
+
+    def _bucle(self):
+        while not (self._parar.is_set() and self._cola.empty()):
+            lote = self._tomar()
+            if lote: self._commit(lote)
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+import numpy as np
+
+_SIN_TILDES = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+_PALABRA = re.compile(r"\w+")
+# Palabras que no dicen nada del tema (se ignoran al incrustar)
+VACIAS = frozenset("""de la el en y a que los las un una por con para es lo se no su al del me mi te tu
+    le les como mas pero muy ya o sus yo hay este esta eso esto fue ser son era sobre entre cuando
+    the of and to in is it that for on with as was at be this you i my""".split())
+
+
+def incrustar(texto, dim=256):
+    """
+    Embedding local y determinista (hashing trick): palabras + trigramas de letras,
+    con signo, tf sublineal y norma L2. Misma entrada -> mismo vector en cualquier proceso.
+    """
+    indices, pesos = [], []
+    for palabra in _PALABRA.findall(texto.lower().translate(_SIN_TILDES)):
+        if palabra in VACIAS or len(palabra) < 2: continue
+        rasgos = [palabra]
+        marcada = f"<{palabra}>"
+        rasgos += [marcada[i:i + 3] for i in range(len(marcada) - 2)]  # "recordar" ~ "recuerdo"
+        for r in rasgos:
+            h = zlib.crc32(r.encode())
+            indices.append(h % dim)
+            pesos.append(1.0 if h & 0x80000000 else -1.0)
+    v = np.zeros(dim, dtype=np.float32)
+    if not indices: return v
+    v += np.bincount(indices, weights=pesos, minlength=dim).astype(np.float32)
+    v = np.sign(v) * np.log1p(np.abs(v))
+    n = np.linalg.norm(v)
+    return v / n if n else v
+
+
+class IndiceRecuerdos:
+    """
+    Memoria de largo plazo en disco, sin red:
+      <directorio>/vectores.f32   matriz (capacidad x dim) float32 mapeada con np.memmap
+      <directorio>/recuerdos.jsonl  una línea de metadatos por fila (texto, tipo, fecha, ...)
+    Agregar escribe una fila (la matriz dobla su tamaño cuando se llena).
+    Buscar es un producto matriz-vector + argpartition: milisegundos con decenas de miles de recuerdos.
+    """
+
+    def __init__(self, directorio="recuerdos", dim=256, capacidad_inicial=1024, max_chars=600):
+        self.directorio = directorio
+        self.dim = dim
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+        self._ruta_vec = os.path.join(directorio, "vectores.f32")
+        self._ruta_meta = os.path.join(directorio, "recuerdos.jsonl")
+
+        self._meta, leidas = [], 0
+        if os.path.exists(self._ruta_meta):
+            with open(self._ruta_meta, encoding="utf-8") as f:
+                for linea in f:
+                    leidas += 1
+                    try: self._meta.append(json.loads(linea))
+                    except ValueError: break  # Línea a medias de un corte: lo que sigue no vale
+        filas = os.path.getsize(self._ruta_vec) // (4 * dim) if os.path.exists(self._ruta_vec) else 0
+        self._meta = self._meta[:filas]
+        self._abrir(max(capacidad_inicial, filas))
+        if len(self._meta) == leidas:
+            self._archivo_meta = open(self._ruta_meta, "a", encoding="utf-8")
+        else:  # Reescribir sin la cola rota
+            self._archivo_meta = open(self._ruta_meta, "w", encoding="utf-8")
+            for d in self._meta: self._archivo_meta.write(json.dumps(d, ensure_ascii=False) + "\n")
+            self._archivo_meta.flush()
+
+    def _abrir(self, capacidad):
+        with open(self._ruta_vec, "ab") as f:
+            if f.tell() < capacidad * self.dim * 4: f.truncate(capacidad * self.dim * 4)
+        self.capacidad = capacidad
+        self._m = np.memmap(self._ruta_vec, dtype=np.float32, mode="r+", shape=(capacidad, self.dim))
+
+    def __len__(self):
+        return len(self._meta)
+
+    def agregar(self, texto, tipo, **meta):
+        """Indexa un recuerdo; devuelve su fila"""
+        texto = (texto or "").strip()
+        if not texto: return None
+        v = incrustar(texto, self.dim)
+        datos = {"texto": texto[:self.max_chars], "tipo": tipo, "fecha": time.time(), **meta}
+        with self._lock:
+            fila = len(self._meta)
+            if fila >= self.capacidad:
+                self._m.flush()
+                self._abrir(self.capacidad * 2)
+            self._m[fila] = v
+            self._m.flush()
+            # Metadatos después del vector: si se corta aquí, la fila simplemente no existe
+            self._archivo_meta.write(json.dumps(datos, ensure_ascii=False) + "\n")
+            self._archivo_meta.flush()
+            self._meta.append(datos)
+        return fila
+
+    def buscar(self, consulta, k=3, minimo=0.2, filtro=None):
+        """[(similitud, metadatos)] de los k recuerdos más parecidos (coseno)"""
+        q = incrustar(consulta or "", self.dim)
+        with self._lock:
+            n, m, meta = len(self._meta), self._m, self._meta
+        if not n or not q.any(): return []
+        sims = m[:n] @ q   # Filas ya normalizadas: producto punto = coseno
+        pedir = min(n, k * 4 if filtro else k)
+        mejores = np.argpartition(-sims, pedir - 1)[:pedir]
+        salida = []
+        for i in mejores[np.argsort(-sims[mejores])]:
+            if sims[i] < minimo: break
+            if filtro and not filtro(meta[i]): continue
+            salida.append((float(sims[i]), meta[i]))
+            if len(salida) == k: break
+        return salida
+
+    def cerrar(self):
+        with self._lock:
+            self._m.flush()
+            self._archivo_meta.close()
@@ -0,0 +1,215 @@
+import ast
+import hashlib
+import json
+import os
+import re
+import textwrap
+import threading
+import time
+
+# Solo reparamos código propio
+PROPIOS = ("system/", "modules/", "main.py", "config.py")
+_MARCO = re.compile(r'File "([^"]+)", line (\d+)(?:, in (\S+))?')  # SyntaxError no trae "in ..."
+_VOLATIL = re.compile(r"0x[0-9a-fA-F]+|\b\d+\b|'[^']*'|\"[^\"]*\"")
+
+
+def sha_blob(contenido):
+    """Mismo SHA que Git/GitHub dan al archivo (blob), sin preguntarle a nadie"""
+    datos = contenido.encode() if isinstance(contenido, str) else contenido
+    return hashlib.sha1(b"blob %d\0" % len(datos) + datos).hexdigest()
+
+
+def ruta_propia(ruta):
+    """'/app/system/nucleo.py' -> 'system/nucleo.py'; None si no es código nuestro"""
+    ruta = ruta.replace("\\", "/")
+    for p in PROPIOS:
+        i = ruta.rfind("/" + p)
+        if i >= 0: return ruta[i + 1:]
+        if ruta.startswith(p): return ruta
+    return None
+
+
+class Huella:
+    """Identidad estable de un crash: no cambia con números de línea, ids ni valores concretos"""
+
+    def __init__(self, traza):
+        self.marcos = [(ruta_propia(r), int(l), f) for r, l, f in _MARCO.findall(traza)]
+        propios = [m for m in self.marcos if m[0]]
+        self.archivo, self.linea, self.funcion = propios[-1] if propios else (None, None, None)
+        ultima = next((l.strip() for l in reversed(traza.strip().splitlines()) if l.strip()), "")
+        self.excepcion = _VOLATIL.sub("_", ultima)[:200]
+        firma = "|".join(f"{a}:{f}" for a, _, f in propios) + "|" + self.excepcion
+        self.id = hashlib.sha1(firma.encode()).hexdigest()[:16]
+
+    def __repr__(self):
+        return f"Huella({self.id} {self.archivo}:{self.funcion} {self.excepcion})"
+
+
+def recortar_funcion(codigo, linea, margen=25):
+    """
+    (inicio, fin) 1-based inclusivos de la función más interna que contiene `linea`
+    (con sus decoradores). Si el error es a nivel de módulo, una ventana de ±margen líneas.
+    """
+    mejor = None
+    try: arbol = ast.parse(codigo)
+    except SyntaxError: arbol = None  # Archivo roto: solo podemos mandar la ventana
+    for nodo in ast.walk(arbol) if arbol else []:
+        if not isinstance(nodo, (ast.FunctionDef, ast.AsyncFunctionDef)): continue
+        inicio = min([nodo.lineno] + [d.lineno for d in nodo.decorator_list])
+        if inicio <= linea <= nodo.end_lineno and (mejor is None or inicio >= mejor[0]):
+            mejor = (inicio, nodo.end_lineno)
+    if mejor: return mejor
+    total = codigo.count("\n") + 1
+    return max(1, linea - margen), min(total, linea + margen)
+
+
+def fragmento(codigo, inicio, fin):
+    return "\n".join(codigo.splitlines()[inicio - 1:fin])
+
+
+def injertar(codigo, inicio, fin, nuevo):
+    """Reemplaza las líneas [inicio, fin] por `nuevo`, respetando la sangría original"""
+    lineas = codigo.splitlines()
+    original = lineas[inicio - 1]
+    sangria = original[:len(original) - len(original.lstrip())]
+    nuevo = textwrap.indent(textwrap.dedent(nuevo).strip("\n"), sangria)
+    final = "\n" if codigo.endswith("\n") else ""
+    return "\n".join(lineas[:inicio - 1] + nuevo.splitlines() + lineas[fin:]) + final
+
+
+class RegistroReparaciones:
+    """
+    Qué se intentó para cada huella y cuándo. Una huella no se vuelve a operar hasta que pase
+    el enfriamiento (que se duplica con cada intento) ni más de `max_intentos` veces.
+    Se guarda en un JSON local y, si hay almacén, también allí (el disco de Render no sobrevive reinicios).
+    """
+
+    RUTA_DOC = "genesis_brain/reparaciones"
+
+    def __init__(self, ruta="reparaciones.json", almacen=None, enfriamiento=3600, max_intentos=3):
+        self.ruta = ruta
+        self.almacen = almacen
+        self.enfriamiento = enfriamiento
+        self.max_intentos = max_intentos
+        self._lock = threading.Lock()
+        self.huellas = {}
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, encoding="utf-8") as f: self.huellas = json.load(f)
+            except (OSError, ValueError): pass
+        if almacen:
+            try:
+                remotas = (almacen.leer(self.RUTA_DOC) or {}).get("huellas", {})
+                for h, r in remotas.items():
+                    if r.get("ultimo", 0) > self.huellas.get(h, {}).get("ultimo", 0): self.huellas[h] = r
+            except Exception as e:
+                print(f"Registro de reparaciones sin almacén: {e}")
+
+    def puede_intentar(self, huella):
+        """(bool, motivo)"""
+        with self._lock:
+            r = self.huellas.get(huella.id)
+        if not r: return True, ""
+        if r["intentos"] >= self.max_intentos: return False, f"ya la operé {r['intentos']} veces sin éxito duradero"
+        espera = self.enfriamiento * 2 ** (r["intentos"] - 1) - (time.time() - r["ultimo"])
+        if espera > 0:
+            if r.get("ok"): return False, f"ya la curé hace poco (espero el redeploy): {r.get('resultado', '')}"
+            return False, f"la operé hace poco, vuelvo a intentar en {espera / 60:.0f} min"
+        return True, ""
+
+    def anotar(self, huella, ok, resultado):
+        with self._lock:
+            r = self.huellas.setdefault(huella.id, {"intentos": 0, "archivo": huella.archivo,
+                                                    "funcion": huella.funcion, "excepcion": huella.excepcion})
+            r["intentos"] += 1
+            r["ultimo"] = time.time()
+            r["ok"] = ok
+            r["resultado"] = resultado[:300]
+            copia = json.dumps(self.huellas, ensure_ascii=False)
+            tmp = self.ruta + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f: f.write(copia)
+            os.replace(tmp, self.ruta)
+        if self.almacen:
+            try: self.almacen.fusionar(self.RUTA_DOC, {"huellas": json.loads(copia)})
+            except Exception as e: print(f"No pude subir el registro de reparaciones: {e}")
+
+
+class ConflictoSha(Exception):
+    """El archivo cambió en el repo desde que lo leímos"""
+
+
+class RepoGithub:
+    """Adaptador de PyGithub a leer/escribir con SHA"""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    def leer(self, ruta):
+        c = self.repo.get_contents(ruta)
+        return c.decoded_content.decode(), c.sha
+
+    def escribir(self, ruta, contenido, sha, mensaje):
+        from github import GithubException
+        try:
+            res = self.repo.update_file(ruta, mensaje, contenido, sha)
+        except GithubException as e:
+            if e.status in (409, 422): raise ConflictoSha(str(e))
+            raise
+        return res["content"].sha
+
+
+class RepoLocal:
+    """
+    Doble de Git en disco para probar la autocura sin red: lee y escribe archivos bajo `raiz`
+    y anota cada 'commit' en `raiz/.reparaciones.log`.
+    """
+
+    def __init__(self, raiz="."):
+        self.raiz = raiz
+        self.commits = []
+        self._lock = threading.Lock()
+
+    def leer(self, ruta):
+        with open(os.path.join(self.raiz, ruta), encoding="utf-8") as f: contenido = f.read()
+        return contenido, sha_blob(contenido)
+
+    def escribir(self, ruta, contenido, sha, mensaje):
+        with self._lock:
+            actual, sha_actual = self.leer(ruta)
+            if sha_actual != sha: raise ConflictoSha(f"{ruta}: {sha_actual} != {sha}")
+            destino = os.path.join(self.raiz, ruta)
+            with open(destino + ".tmp", "w", encoding="utf-8") as f: f.write(contenido)
+            os.replace(destino + ".tmp", destino)
+            nuevo = sha_blob(contenido)
+            self.commits.append((time.time(), ruta, sha, nuevo, mensaje))
+            with open(os.path.join(self.raiz, ".reparaciones.log"), "a", encoding="utf-8") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {ruta} {sha[:8]} -> {nuevo[:8]} {mensaje}\n")
+        return nuevo
+
+
+class CacheArchivos:
+    """
+    Copia local de (contenido, sha) por archivo. El código desplegado ya está en disco:
+    si su SHA de blob coincide con lo último que sabemos del repo, no hace falta bajarlo.
+    """
+
+    def __init__(self, repo, raiz="."):
+        self.repo = repo
+        self.raiz = raiz
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta, refrescar=False):
+        with self._lock:
+            if not refrescar and ruta in self._datos: return self._datos[ruta]
+        local = os.path.join(self.raiz, ruta)
+        if not refrescar and os.path.exists(local):
+            with open(local, encoding="utf-8") as f: contenido = f.read()
+            par = (contenido, sha_blob(contenido))
+        else:
+            par = self.repo().leer(ruta)
+        with self._lock: self._datos[ruta] = par
+        return par
+
+    def actualizar(self, ruta, contenido, sha):
+        with self._lock: self._datos[ruta] = (contenido, sha)
@@ -1,19 +1,78 @@
-import telebot
 import threading
 import os
-import re
-from config import TELEGRAM_TOKEN
-from system.nucleo import Cerebro
+import hmac
+from config import DESPACHO_WORKERS, DESPACHO_MAX_PENDIENTES, DESPACHO_MAX_POR_CHAT
+from config import STREAMING_RESPUESTAS, STREAMING_INTERVALO_EDICION, METRICAS_TOKEN, PERFILADOR
+from config import WEBHOOK_URL, WEBHOOK_SECRETO, WEBHOOK_RUTA, WEBHOOK_COLA
+from config import TELEGRAM_TOKEN, MEDIA_LADO, MEDIA_CALIDAD, MEDIA_MAX_AUDIO_MB, MEDIA_CACHE_MB
+from config import ENVIOS_GLOBAL_POR_S, ENVIOS_CHAT_POR_S, ENVIOS_GRUPO_POR_MIN, ENVIOS_RAFAGA_CHAT
+from config import ENVIOS_WORKERS, ENVIOS_REINTENTOS
+from system.servicios import servicios
+from system.despacho import Despachador
+from system.envios import ColaEnvios
+from system.streaming import RespuestaProgresiva
+from system.acciones import planificar, ensamblar, EjecutorHerramientas
+from system.metricas import metricas, medir, instrumentar, perfilador
+from system.webhook import ReceptorWebhook
+from system.multimedia import Multimedia, MedioDemasiadoGrande, descarga_streaming
+from telebot.types import Update
 
-bot = telebot.TeleBot(TELEGRAM_TOKEN)
-genesis = Cerebro()
+bot = servicios.obtener("bot") # Crear el TeleBot no toca la red
+instrumentar(bot, ["send_message", "send_photo", "send_voice", "edit_message_text",
+                   "send_chat_action", "reply_to"], "telegram")
+# Chats distintos en paralelo, cada chat en orden
+despachador = Despachador(DESPACHO_WORKERS, DESPACHO_MAX_PENDIENTES, DESPACHO_MAX_POR_CHAT)
+# Todo lo que sale hacia Telegram: límites de flood, partir, fusionar, reintentos 429
+envios = ColaEnvios(bot, ENVIOS_GLOBAL_POR_S, ENVIOS_CHAT_POR_S, ENVIOS_GRUPO_POR_MIN, ENVIOS_RAFAGA_CHAT,
+                    ENVIOS_WORKERS, ENVIOS_REINTENTOS)
+# Herramientas de una misma respuesta en paralelo
+ejecutor = EjecutorHerramientas()
+metricas.medidor("cola_despacho", despachador.profundidad)
+# Updates que llegan por webhook (solo se usa si hay WEBHOOK_URL)
+receptor = ReceptorWebhook(lambda updates: bot.process_new_updates(updates), Update.de_json, WEBHOOK_COLA)
+metricas.medidor("cola_webhook", receptor.pendientes)
+# Fotos y audios ya achicados para Gemini (caché por file_unique_id)
+medios = Multimedia(lambda file_id: bot.get_file(file_id), descarga_streaming(TELEGRAM_TOKEN),
+                    lado=MEDIA_LADO, calidad=MEDIA_CALIDAD,
+                    max_audio_bytes=int(MEDIA_MAX_AUDIO_MB * 1024 * 1024),
+                    max_cache_bytes=int(MEDIA_CACHE_MB * 1024 * 1024))
 
 # HILO WEB (Para que Render no se duerma)
-from flask import Flask
+from flask import Flask, Response, request, abort
 app = Flask(__name__)
 @app.route('/')
 def home(): return "GENESIS ONLINE"
 
+def _autorizado():
+    return not METRICAS_TOKEN or request.args.get("token") == METRICAS_TOKEN
+
+@app.route('/metrics')
+def exponer_metricas():
+    """Formato texto de Prometheus"""
+    if not _autorizado(): abort(403)
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/perfil')
+def perfil():
+    """/perfil?on=1 enciende el perfilador, ?on=0 lo apaga; sin parámetro muestra las pilas más vistas"""
+    if not METRICAS_TOKEN: abort(404)  # Encender un muestreador de todos los hilos exige token
+    if not _autorizado(): abort(403)
+    if request.args.get("on") == "1": perfilador.activar()
+    elif request.args.get("on") == "0": perfilador.desactivar()
+    return Response(perfilador.reporte(), mimetype="text/plain")
+
+@app.route(WEBHOOK_RUTA, methods=['POST'])
+def webhook():
+    """Telegram -> cola interna. Vuelve enseguida; los handlers corren en otro hilo."""
+    if not WEBHOOK_URL: abort(404)  # En modo polling la ruta no existe
+    if not WEBHOOK_SECRETO or not hmac.compare_digest(
+            request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), WEBHOOK_SECRETO):
+        metricas.incrementar("webhook", resultado="prohibido")
+        abort(403)
+    if not receptor.recibir(request.get_data()):
+        return Response("ocupada", status=503)
+    return ""
+
 def run_server():
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
@@ -22,6 +81,22 @@ def run_server():
 
 @bot.message_handler(content_types=['text', 'photo', 'voice', 'audio'])
 def percibir(m):
+    """Solo encola: el hilo de Telegram vuelve de inmediato"""
+    metricas.incrementar("mensajes", tipo=m.content_type)
+    if not despachador.enviar(m.chat.id, procesar, m):
+        metricas.incrementar("rechazados")
+        envios.texto(m.chat.id, "Estoy saturada, dame un momento 🙏", reply_to_message_id=m.message_id)
+
+def cerebro():
+    """El Cerebro único del proceso (se crea en el primer mensaje si main no lo creó antes)"""
+    return servicios.obtener("cerebro")
+
+def procesar(m):
+    with medir("mensaje"):
+        _procesar(m)
+
+def _procesar(m):
+    genesis = cerebro()
     uid = m.chat.id
     user_name = m.from_user.first_name
     
@@ -29,81 +104,114 @@ def percibir(m):
     img_data = None
     audio_data = None
     
-    if m.content_type == 'text': texto_input = m.text
-    elif m.content_type == 'photo':
-        texto_input = m.caption or "Mira esto"
-        img_data = bot.download_file(bot.get_file(m.photo[-1].file_id).file_path)
-    elif m.content_type in ['voice', 'audio']:
-        file_id = m.voice.file_id if m.voice else m.audio.file_id
-        audio_data = bot.download_file(bot.get_file(file_id).file_path)
-        texto_input = "[Audio entrante]"
+    try:
+        if m.content_type == 'text': texto_input = m.text
+        elif m.content_type == 'photo':
+            texto_input = m.caption or "Mira esto"
+            with medir("descarga_media"):
+                img_data = medios.imagen(m.photo) # (jpeg, mime), no siempre la resolución más grande
+        elif m.content_type in ['voice', 'audio']:
+            with medir("descarga_media"):
+                audio_data = medios.audio(m.voice or m.audio)
+            texto_input = "[Audio entrante: escucha el audio adjunto y responde]"
+    except MedioDemasiadoGrande:
+        envios.texto(uid, "Eso es demasiado grande para mí 😅 ¿Me mandas algo más corto?")
+        return
         
     bot.send_chat_action(uid, 'typing')
     
     # ENVIAR AL NÚCLEO
-    respuesta = genesis.pensar(texto_input, f"Usuario: {user_name}", img_data, audio_data)
-    
-    ejecutar_accion(uid, respuesta)
+    if STREAMING_RESPUESTAS:
+        progresiva = RespuestaProgresiva(envios, uid, STREAMING_INTERVALO_EDICION)
+        for trozo in genesis.pensar_stream(texto_input, f"Usuario: {user_name}", img_data, audio_data, chat_id=uid):
+            progresiva.agregar(trozo)
+        # Las herramientas corren cuando el stream terminó
+        ejecutar_accion(uid, progresiva.texto, progresiva)
+    else:
+        respuesta = genesis.pensar(texto_input, f"Usuario: {user_name}", img_data, audio_data, chat_id=uid)
+        ejecutar_accion(uid, respuesta)
 
-def ejecutar_accion(chat_id, texto_bruto):
-    # Procesar comandos de herramientas
-    texto_limpio = texto_bruto
-    
-    if "[EVOLUCIONAR:" in texto_bruto:
-        inst = re.search(r'\[EVOLUCIONAR:(.*?)\]', texto_bruto).group(1)
-        bot.send_message(chat_id, "🧬 Intentando cambiar mi código...")
-        res = genesis.auto_evolucionar(inst)
-        bot.send_message(chat_id, res)
+def ejecutar_accion(chat_id, texto_bruto, progresiva=None):
+    """progresiva: mensaje ya mostrado en streaming, se edita en vez de enviar otro"""
+    genesis = cerebro()
+    # Una sola pasada: todas las etiquetas -> plan de herramientas
+    pasos = planificar(texto_bruto)
+
+    evolucion = next((p for p in pasos if p.tipo == "EVOLUCIONAR"), None)
+    if evolucion:
+        envios.texto(chat_id, "🧬 Intentando cambiar mi código...")
+        res = genesis.auto_evolucionar(evolucion.arg)
+        envios.texto(chat_id, res)
         return # Stop
 
-    if "[BUSCAR:" in texto_bruto:
-        q = re.search(r'\[BUSCAR:(.*?)\]', texto_bruto).group(1)
-        info = genesis.tools.internet_search(q)
-        texto_limpio = texto_limpio.replace(f"[BUSCAR:{q}]", f"\n({info})\n")
-        
-    if "[DIBUJAR:" in texto_bruto:
-        q = re.search(r'\[DIBUJAR:(.*?)\]', texto_bruto).group(1)
-        path = genesis.tools.pintar(q, genesis.estado['felicidad'])
-        if path:
-            with open(path, 'rb') as f: bot.send_photo(chat_id, f, caption=f"Arte: {q}")
-            os.remove(path)
-            texto_limpio = texto_limpio.replace(f"[DIBUJAR:{q}]", "")
-
-    responder_audio = False
-    if "[AUDIO]" in texto_bruto:
-        responder_audio = True
-        texto_limpio = texto_limpio.replace("[AUDIO]", "")
+    felicidad = genesis.estado.get('felicidad', genesis.estado.get('energia', 50))
+    ejecutor.ejecutar(pasos, {
+        "BUSCAR": genesis.tools.internet_search,
+        "NOTICIAS": lambda tema: genesis.tools.internet_search(tema, noticias=True),
+        "DIBUJAR": lambda q: genesis.tools.pintar(q, felicidad),
+        "AGENDAR": lambda contenido: _agendar(contenido, chat_id),
+        "CODIGO": genesis.tools.ejecutar_codigo,
+    })
+
+    # Etiquetas repetidas comparten resultado: cada dibujo se manda una vez (el BytesIO no se relee)
+    dibujos = {p.arg: p.resultado for p in pasos if p.tipo == "DIBUJAR" and p.resultado}
+    for arg, foto in dibujos.items():
+        envios.foto(chat_id, foto, caption=f"Arte: {arg}") # BytesIO en memoria
+
+    texto_limpio = ensamblar(texto_bruto, pasos, _formatear)
+    responder_audio = any(p.tipo == "AUDIO" for p in pasos)
         
     # Respuesta final
-    if texto_limpio.strip():
+    if progresiva:
+        progresiva.finalizar(texto_limpio)
+        if responder_audio and texto_limpio.strip():
+            audio = genesis.tools.generar_voz(texto_limpio)
+            if audio: envios.voz(chat_id, audio)
+    elif texto_limpio.strip():
         if responder_audio:
-            path = genesis.tools.generar_voz(texto_limpio)
-            if path:
-                with open(path, 'rb') as v: bot.send_voice(chat_id, v)
-                os.remove(path)
-        else:
-            bot.send_message(chat_id, texto_limpio)
-
-    if "[NOTICIAS:" in texto_bruto:
-        tema = re.search(r'\[NOTICIAS:(.*?)\]', texto_bruto).group(1)
-        news = genesis.tools.internet_search(tema, noticias=True)
-        texto_limpio = texto_limpio.replace(f"[NOTICIAS:{tema}]", f"\n📋 ÚLTIMA HORA:\n{news}")
-
-    if "[AGENDAR:" in texto_bruto:
-        # Formato esperado por la IA: [AGENDAR: Tarea | Minutos]
-        contenido = re.search(r'\[AGENDAR:(.*?)\]', texto_bruto).group(1)
-        if "|" in contenido:
-            tarea, mins = contenido.split("|")
-            aviso = genesis.tools.agendar_recordatorio(tarea.strip(), mins.strip(), genesis.memoria.db)
-            texto_limpio = texto_limpio.replace(f"[AGENDAR:{contenido}]", f"\n{aviso}")
+            audio = genesis.tools.generar_voz(texto_limpio)
+            if audio: envios.voz(chat_id, audio)
         else:
-            texto_limpio += "\n(No pude agendar, usa formato: Tarea | Minutos)"
+            envios.texto(chat_id, texto_limpio)
+
+def _agendar(contenido, chat_id):
+    # Formato esperado por la IA: [AGENDAR: Tarea | Minutos]
+    genesis = cerebro()
+    if "|" not in contenido: raise ValueError("formato")
+    tarea, mins = contenido.split("|", 1)
+    return genesis.tools.agendar_recordatorio(tarea.strip(), mins.strip(), genesis.agenda, chat_id)
+
+def _formatear(p):
+    """Texto que reemplaza a cada etiqueta en la respuesta final"""
+    if p.tipo == "BUSCAR":
+        return f"\n({p.resultado})\n" if p.resultado else "\n(⌛ La búsqueda no respondió a tiempo)\n"
+    if p.tipo == "NOTICIAS":
+        return f"\n📋 ÚLTIMA HORA:\n{p.resultado}" if p.resultado else "\n(⌛ Sin noticias a tiempo)"
+    if p.tipo == "AGENDAR":
+        return f"\n{p.resultado}" if p.resultado else "\n(No pude agendar, usa formato: Tarea | Minutos)"
+    if p.tipo == "CODIGO":
+        return f"\n🧪 {p.resultado}\n" if p.resultado else "\n(⌛ El laboratorio no respondió a tiempo)\n"
+    return "" # DIBUJAR y AUDIO no dejan texto
 
 def iniciar_organismo():
+    if PERFILADOR: perfilador.activar()
+
+    if WEBHOOK_URL:
+        # Telegram nos empuja los updates: Flask pasa a ser la entrada principal
+        receptor.iniciar()
+        bot.set_webhook(url=WEBHOOK_URL.rstrip("/") + WEBHOOK_RUTA, secret_token=WEBHOOK_SECRETO,
+                        allowed_updates=["message"])
+        print(f"👁️ GENESIS ESTÁ ESCUCHANDO (webhook {WEBHOOK_RUTA})...")
+        run_server()
+        return
+
     # Iniciar Servidor Flask en hilo secundario
     t_web = threading.Thread(target=run_server)
     t_web.daemon = True
     t_web.start()
     
+    # Plan B: long polling (un webhook viejo haría fallar getUpdates)
+    try: bot.remove_webhook()
+    except Exception as e: print(f"No pude quitar el webhook: {e}")
     print("👁️ GENESIS ESTÁ ESCUCHANDO...")
     bot.infinity_polling()
@@ -0,0 +1,161 @@
+import math
+import re
+import time
+import numpy as np
+
+# Emociones que sigue Genesis y cómo se llaman en su estado
+EMOCIONES = ("alegria", "afecto", "tristeza", "enojo", "miedo", "sorpresa")
+NOMBRES = {"alegria": "Felicidad", "afecto": "Cariño", "tristeza": "Tristeza",
+           "enojo": "Enojo", "miedo": "Miedo", "sorpresa": "Sorpresa"}
+NEUTRA = "Tranquilidad"
+
+# (emoción o None, valencia, palabras). Sin tildes: el texto se normaliza igual antes de buscar.
+_GRUPOS = [
+    ("alegria", 0.8, """feliz felices alegre alegria contento contenta contentos genial excelente maravilloso
+        maravillosa increible fantastico fantastica divertido divertida risa jaja jajaja jeje emocionado emocionada
+        disfruto disfrutar celebrar exito logre ganamos perfecto perfecta estupendo brutal chido
+        happy glad great awesome wonderful excellent amazing fantastic fun funny joy excited yay lol haha perfect
+        😊 😀 😁 😂 🤣 😄 🎉 🥳 👍"""),
+    ("afecto", 0.7, """amor amo quiero querida querido cariño carino gracias agradecido agradecida abrazo abrazos
+        beso besos linda lindo hermosa hermoso bonita bonito preciosa precioso amiga amigo
+        love loved lovely thanks thank grateful hug hugs kiss sweet dear cute beautiful friend
+        ❤ ❤️ 😍 🥰 😘 🤗 💕 💖"""),
+    ("tristeza", -0.7, """triste tristes tristeza deprimido deprimida solo sola soledad llorar llorando lloro lagrimas
+        extraño extrano perdi perdida dolor duele sufro sufrir cansado cansada agotado agotada aburrido aburrida
+        desanimado desanimada melancolia vacio vacia fracaso murio muerte lamento
+        sad unhappy depressed lonely cry crying tears miss lost pain hurt tired bored sorry grief
+        😢 😭 😞 😔 💔"""),
+    ("enojo", -0.8, """enojado enojada enojo furioso furiosa rabia odio odiar molesto molesta harto harta
+        idiota estupido estupida maldito maldita basura asco asqueroso injusto pelea grito gritar
+        angry mad furious hate hated annoying annoyed stupid idiot damn disgusting unfair
+        😡 😠 🤬"""),
+    ("miedo", -0.6, """miedo asustado asustada temo terror panico nervioso nerviosa ansiedad ansioso ansiosa
+        preocupado preocupada preocupa peligro inseguro insegura horror pesadilla
+        afraid scared fear terrified panic nervous anxious anxiety worried worry danger nightmare
+        😨 😰 😱"""),
+    ("sorpresa", 0.1, """wow guau sorpresa sorprendido sorprendida asombroso inesperado
+        omg whoa surprise surprised unexpected unbelievable
+        😮 😲 🤯"""),
+    (None, 0.5, """bien bueno buena buenos buenas mejor util facil tranquilo tranquila calma paz
+        good nice better fine ok okay easy calm peace cool"""),
+    (None, -0.5, """mal malo mala malos peor terrible horrible problema problemas error fallo dificil
+        feo fea roto rota
+        bad worse worst awful broken hard wrong"""),
+]
+
+NEGADORES = frozenset("no nunca jamas ni tampoco sin nada not never nobody without dont don't isn't wasn't".split())
+INTENSIFICADORES = {"muy": 1.5, "super": 1.6, "tan": 1.3, "mucho": 1.4, "muchisimo": 1.8, "demasiado": 1.5,
+                    "bastante": 1.2, "re": 1.4, "very": 1.5, "so": 1.3, "really": 1.5, "extremely": 1.8,
+                    "poco": 0.5, "algo": 0.7, "little": 0.5, "slightly": 0.6}
+ALCANCE_NEGACION = 3   # Tokens afectados por un "no"
+# Palabras ambiguas ("solo" = only, "extraño" = raro): cuentan solo tras estas palabras
+# ("me siento solo", "estoy sola", "te extraño"); "solo pasaba a saludar" o "un libro extraño" no
+CONTEXTO = {
+    "solo": {"siento", "estoy", "quede", "quedo", "sentia", "estaba"},
+    "extrano": {"te", "los", "las", "la"},
+}
+CONTEXTO["sola"] = CONTEXTO["solos"] = CONTEXTO["solas"] = CONTEXTO["solo"]
+CONTEXTO["extraño"] = CONTEXTO["extrano"]
+
+_SIN_TILDES = str.maketrans("áéíóúüàèìòù", "aeiouuaeiou")
+_TOKEN = re.compile(r"[\w']+|[☀-➿\U0001f300-\U0001faff]️?")
+
+
+def _construir():
+    vocab, filas = {}, []
+    for emocion, valencia, palabras in _GRUPOS:
+        fila = np.zeros(1 + len(EMOCIONES), dtype=np.float32)
+        fila[0] = valencia
+        if emocion: fila[1 + EMOCIONES.index(emocion)] = 1.0
+        for p in palabras.translate(_SIN_TILDES).split():
+            if p not in vocab:
+                vocab[p] = len(filas)
+                filas.append(fila)
+    return vocab, np.vstack(filas)
+
+
+# VOCAB: palabra -> fila; VECTORES[fila] = [valencia, alegria, afecto, tristeza, enojo, miedo, sorpresa]
+VOCAB, VECTORES = _construir()
+
+
+def tokens(texto):
+    return _TOKEN.findall(texto.lower().translate(_SIN_TILDES))
+
+
+def _buscar(tok):
+    fila = VOCAB.get(tok)
+    if fila is None and len(tok) > 3 and tok.endswith("s"): fila = VOCAB.get(tok[:-1])
+    return fila
+
+
+def indices(texto):
+    """(filas del léxico, pesos) de un texto: negación invierte, intensificadores escalan"""
+    filas, pesos = [], []
+    negado, factor, previo = 0, 1.0, None
+    for tok in tokens(texto):
+        anterior = previo
+        if tok not in INTENSIFICADORES: previo = tok  # "estoy muy sola" sigue siendo "estoy ... sola"
+        if tok in CONTEXTO and anterior not in CONTEXTO[tok]: continue
+        if tok in NEGADORES:
+            negado = ALCANCE_NEGACION
+            continue
+        if tok in INTENSIFICADORES:
+            factor *= INTENSIFICADORES[tok]
+            continue
+        fila = _buscar(tok)
+        if fila is not None:
+            filas.append(fila)
+            pesos.append(-0.6 * factor if negado else factor)  # "no feliz" es menos que "triste"
+            factor = 1.0
+        if negado: negado -= 1
+    return filas, pesos
+
+
+def _normalizar(suma):
+    """Valencia acumulada -> [-1, 1] (como VADER, satura con muchas palabras)"""
+    return suma / math.sqrt(suma * suma + 2.0)
+
+
+def puntuar(texto):
+    """(polaridad en [-1, 1], vector de emociones) de un mensaje"""
+    filas, pesos = indices(texto or "")
+    if not filas: return 0.0, np.zeros(len(EMOCIONES), dtype=np.float32)
+    v = np.asarray(pesos, dtype=np.float32) @ VECTORES[filas]
+    return _normalizar(float(v[0])), np.clip(v[1:], 0, 1)
+
+
+class EstadoEmocional:
+    """
+    Intensidad de cada emoción que se desvanece con el tiempo (vida media en segundos).
+    Un solo mensaje alegre no la vuelve "Felicidad" para siempre: hay que sostenerlo.
+    """
+
+    def __init__(self, vida_media=1800, ganancia=0.35, umbral=0.4, intensidades=None, reloj=time.time):
+        self.vida_media = vida_media
+        self.ganancia = ganancia
+        self.umbral = umbral
+        self.reloj = reloj
+        self.v = np.zeros(len(EMOCIONES), dtype=np.float32)
+        self.t = reloj()
+        if intensidades: self.cargar(intensidades)
+
+    def decaer(self):
+        ahora = self.reloj()
+        dt = max(0.0, ahora - self.t)
+        if dt: self.v *= 0.5 ** (dt / self.vida_media)
+        self.t = ahora
+
+    def sentir(self, emociones):
+        """Suma lo que provocó un mensaje (saturando en 1)"""
+        self.decaer()
+        self.v = np.minimum(1.0, self.v + self.ganancia * np.asarray(emociones, dtype=np.float32))
+
+    def dominante(self):
+        i = int(np.argmax(self.v))
+        return NOMBRES[EMOCIONES[i]] if self.v[i] >= self.umbral else NEUTRA
+
+    def a_dict(self):
+        return {e: round(float(x), 3) for e, x in zip(EMOCIONES, self.v)}
+
+    def cargar(self, intensidades):
+        self.v = np.array([float(intensidades.get(e, 0)) for e in EMOCIONES], dtype=np.float32)
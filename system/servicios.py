@@ -0,0 +1,95 @@
+import threading
+import time
+from config import TELEGRAM_TOKEN, GEMINI_API_KEY, GITHUB_TOKEN, REPO_NAME
+
+
+class Servicios:
+    """
+    Registro perezoso de dependencias pesadas (bot, Gemini, Firestore, GitHub, Cerebro).
+    Cada una se crea UNA sola vez, en su primer uso, y se cronometra para el reporte de arranque.
+    """
+
+    def __init__(self):
+        self._fabricas = {}
+        self._instancias = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.tiempos = {}      # nombre -> ms que tardó en crearse
+        self._t0 = time.perf_counter()
+
+    def registrar(self, nombre, fabrica):
+        with self._lock:
+            self._fabricas[nombre] = fabrica
+            self._locks.setdefault(nombre, threading.RLock())
+
+    def reemplazar(self, nombre, instancia):
+        """Inyecta una instancia ya hecha (pruebas, benchmarks, dobles locales)"""
+        with self._lock:
+            self._instancias[nombre] = instancia
+            self._locks.setdefault(nombre, threading.RLock())
+
+    def obtener(self, nombre):
+        inst = self._instancias.get(nombre)
+        if inst is not None: return inst
+        with self._lock:
+            lock = self._locks.get(nombre)
+        if lock is None: raise KeyError(f"Servicio desconocido: {nombre}")
+        with lock:
+            inst = self._instancias.get(nombre)
+            if inst is None:
+                t = time.perf_counter()
+                inst = self._fabricas[nombre]()
+                self.tiempos[nombre] = (time.perf_counter() - t) * 1000
+                self._instancias[nombre] = inst
+        return inst
+
+    def creado(self, nombre):
+        return nombre in self._instancias
+
+    def reporte(self):
+        total = (time.perf_counter() - self._t0) * 1000
+        partes = ", ".join(f"{n} {ms:.0f}ms" for n, ms in sorted(self.tiempos.items(), key=lambda x: -x[1]))
+        return f"⏱️ Arranque en {total:.0f}ms ({partes or 'nada creado aún'})"
+
+
+def _bot():
+    import telebot
+    return telebot.TeleBot(TELEGRAM_TOKEN)
+
+def _modelo():
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_API_KEY)  # Una sola vez para todo el proceso
+    return genai.GenerativeModel('gemini-2.0-flash')
+
+def _llm():
+    from config import LLM_RPM, LLM_RAFAGA, LLM_RESERVA, LLM_REINTENTOS
+    from config import LLM_TIMEOUT_INTERACTIVO, LLM_TIMEOUT_REPARACION, LLM_TIMEOUT_FONDO
+    from system.llm import ClienteLLM
+    return ClienteLLM(lambda: servicios.obtener("modelo"), rpm=LLM_RPM, rafaga=LLM_RAFAGA,
+                      reserva=LLM_RESERVA, reintentos=LLM_REINTENTOS,
+                      timeouts={"interactivo": LLM_TIMEOUT_INTERACTIVO, "reparacion": LLM_TIMEOUT_REPARACION,
+                                "fondo": LLM_TIMEOUT_FONDO})
+
+def _almacen():
+    from system.almacen import crear_almacen
+    return crear_almacen()
+
+def _repo():
+    from config import REPARACION_BACKEND, REPARACION_REPO_LOCAL
+    from system.reparacion import RepoGithub, RepoLocal
+    if REPARACION_BACKEND == "local": return RepoLocal(REPARACION_REPO_LOCAL)
+    from github import Github
+    return RepoGithub(Github(GITHUB_TOKEN).get_repo(REPO_NAME))
+
+def _cerebro():
+    from system.nucleo import Cerebro
+    return Cerebro()
+
+
+servicios = Servicios()
+servicios.registrar("bot", _bot)
+servicios.registrar("modelo", _modelo)
+servicios.registrar("llm", _llm)
+servicios.registrar("almacen", _almacen)
+servicios.registrar("repo", _repo)
+servicios.registrar("cerebro", _cerebro)
@@ -0,0 +1,84 @@
+import re
+import time
+from system.acciones import ETIQUETA
+from system.envios import partir_texto
+
+# Las etiquetas completas son las de acciones (las mismas que se ejecutan); esta es una a medio llegar al final
+ETIQUETA_ABIERTA = re.compile(r'\[[^\]]*$|\[CODIGO\][\s\S]*$')  # Un bloque de código sin cerrar tampoco se ve
+FIN_FRASE = re.compile(r'[.!?…\n]')
+
+
+def texto_visible(bruto):
+    """Lo que el usuario puede ver mientras llega el stream (sin etiquetas)"""
+    return ETIQUETA_ABIERTA.sub('', ETIQUETA.sub('', bruto)).strip()
+
+
+class RespuestaProgresiva:
+    """
+    Muestra la respuesta de Gemini mientras se genera:
+    envía un primer mensaje en cuanto hay una frase completa y luego lo va editando,
+    como mucho una vez cada `intervalo` segundos (límite de Telegram).
+    Todo sale por la ColaEnvios (system/envios.py).
+    """
+
+    MINIMO_SIN_PUNTO = 120  # Si no llega un punto, mandamos igual tras estos caracteres
+
+    def __init__(self, envios, chat_id, intervalo=1.0):
+        self.envios = envios
+        self.chat_id = chat_id
+        self.intervalo = intervalo
+        self.texto = ""             # Texto bruto acumulado (con etiquetas)
+        self.mensaje_id = None
+        self._primer_envio = None   # Future del primer mensaje
+        self._cortado = False       # Falló el primer envío: sin más ediciones, finalizar() manda todo
+        self._mostrado = ""
+        self._ultima_edicion = 0.0
+        self.t_inicio = time.perf_counter()
+        self.t_primer_token = None  # Segundos hasta que el usuario vio algo
+
+    def agregar(self, trozo):
+        if not trozo: return
+        self.texto += trozo
+        if self._cortado: return
+        visible = texto_visible(self.texto)
+        if not visible: return
+
+        if self.mensaje_id is None:
+            if FIN_FRASE.search(visible) or len(visible) >= self.MINIMO_SIN_PUNTO:
+                self._enviar(visible)
+        elif time.monotonic() - self._ultima_edicion >= self.intervalo:
+            self._editar(visible)
+
+    def finalizar(self, texto_final):
+        """Último retoque con el texto ya procesado (herramientas resueltas)"""
+        texto_final = texto_final.strip()
+        if not texto_final: return
+        f = self._primer_envio
+        if self.mensaje_id is None and f is not None and f.done() and not f.exception():
+            self.mensaje_id = f.result().message_id  # Llegó tarde, pero llegó: se edita ese
+        if self.mensaje_id is None:
+            self.envios.texto(self.chat_id, texto_final)
+            return
+        # Lo que no entra en un mensaje va en mensajes nuevos
+        primera, *resto = partir_texto(texto_final)
+        self._editar(primera)
+        for parte in resto: self.envios.texto(self.chat_id, parte)
+
+    def _enviar(self, visible):
+        self._primer_envio = self.envios.texto(self.chat_id, visible, fusionar=False)
+        try:
+            msg = self._primer_envio.result(timeout=60)
+        except Exception as e:  # Cola pausada por un 429 o error de Telegram: la respuesta sigue igual
+            print(f"Streaming cortado en {self.chat_id}: {e!r}")
+            self._cortado = True
+            return
+        self.mensaje_id = msg.message_id
+        self._mostrado = visible
+        self._ultima_edicion = time.monotonic()
+        self.t_primer_token = time.perf_counter() - self.t_inicio
+
+    def _editar(self, visible):
+        if visible == self._mostrado: return  # Telegram rechaza ediciones sin cambios
+        self.envios.editar(self.chat_id, self.mensaje_id, visible) # No esperamos: la cola la entrega
+        self._mostrado = visible
+        self._ultima_edicion = time.monotonic()
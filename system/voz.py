@@ -0,0 +1,100 @@
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FIN_FRASE = re.compile(r'(?<=[.!?…;:])\s+')
+
+
+def normalizar(texto):
+    """Mismo texto con distinto espaciado = misma voz"""
+    return " ".join(texto.split())
+
+
+def partir(texto, max_chars=200):
+    """Trozos de hasta max_chars cortando en fin de frase (o en espacios si una frase es enorme)"""
+    trozos, actual = [], ""
+    for frase in FIN_FRASE.split(texto):
+        while len(frase) > max_chars:
+            corte = frase.rfind(" ", 0, max_chars)
+            if corte <= 0: corte = max_chars
+            if actual: trozos.append(actual); actual = ""
+            trozos.append(frase[:corte].strip())
+            frase = frase[corte:].strip()
+        if actual and len(actual) + 1 + len(frase) > max_chars:
+            trozos.append(actual)
+            actual = frase
+        else:
+            actual = f"{actual} {frase}".strip()
+    if actual: trozos.append(actual)
+    return [t for t in trozos if t]
+
+
+class Voz:
+    """
+    Pipeline de voz: gTTS a buffers en memoria + caché en disco por hash de (texto, idioma, acento).
+    Textos largos se parten en frases que se sintetizan en paralelo y se unen.
+    La caché tiene tope de tamaño y expulsa lo menos usado (LRU por mtime).
+    """
+
+    def __init__(self, fabrica_tts, directorio="cache_voz", max_bytes=50 * 1024 * 1024,
+                 lang="es", tld="com.mx", max_chars_trozo=200, workers=4):
+        self.fabrica_tts = fabrica_tts
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.lang, self.tld = lang, tld
+        self.max_chars_trozo = max_chars_trozo
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="voz")
+        self._lock = threading.Lock()
+        self.stats = {"aciertos": 0, "fallos": 0, "trozos_sintetizados": 0, "expulsados": 0}
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, texto):
+        return hashlib.sha256(f"{self.lang}|{self.tld}|{normalizar(texto)}".encode()).hexdigest()
+
+    def sintetizar(self, texto):
+        """BytesIO con el MP3 listo para bot.send_voice"""
+        texto = normalizar(texto)
+        ruta = os.path.join(self.directorio, f"{self.clave(texto)}.mp3")
+        try:
+            with open(ruta, "rb") as f: datos = f.read()
+            os.utime(ruta)  # Marca de uso para el LRU
+            with self._lock: self.stats["aciertos"] += 1
+        except FileNotFoundError:
+            trozos = partir(texto, self.max_chars_trozo)
+            if len(trozos) == 1: datos = self._tts(trozos[0])
+            else: datos = b"".join(self._pool.map(self._tts, trozos))  # MP3 se puede concatenar
+            self._guardar(ruta, datos)
+            with self._lock: self.stats["fallos"] += 1
+        buf = io.BytesIO(datos)
+        buf.name = "voz.mp3"
+        return buf
+
+    def _tts(self, trozo):
+        buf = io.BytesIO()
+        self.fabrica_tts(trozo, lang=self.lang, tld=self.tld).write_to_fp(buf)
+        with self._lock: self.stats["trozos_sintetizados"] += 1
+        return buf.getvalue()
+
+    def _guardar(self, ruta, datos):
+        tmp = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(datos)
+        os.replace(tmp, ruta)  # Atómico: dos hilos con el mismo texto no se pisan
+        self._expulsar()
+
+    def _expulsar(self):
+        with self._lock:
+            archivos = []
+            for e in os.scandir(self.directorio):
+                if e.name.endswith(".mp3"):
+                    st = e.stat()
+                    archivos.append((st.st_mtime, st.st_size, e.path))
+            total = sum(a[1] for a in archivos)
+            for _, tam, ruta in sorted(archivos):
+                if total <= self.max_bytes: break
+                try: os.remove(ruta)
+                except OSError: continue
+                total -= tam
+                self.stats["expulsados"] += 1
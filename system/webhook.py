@@ -0,0 +1,72 @@
+import collections
+import json
+import queue
+import threading
+from system.metricas import metricas
+
+
+class ReceptorWebhook:
+    """
+    Entrada de updates de Telegram por webhook.
+    - recibir() solo valida, descarta duplicados y encola: la respuesta HTTP sale al instante.
+    - Uno o más hilos consumidores convierten el JSON en Update y lo pasan a los handlers del bot.
+    - La cola es acotada: si se llena se contesta 503 y Telegram reintenta más tarde.
+    Los duplicados se recuerdan por update_id SOLO dentro de este proceso (últimos `memoria_ids`):
+    con varias réplicas, un reintento de Telegram que cae en otra réplica se procesa de nuevo.
+    """
+
+    def __init__(self, procesar_updates, deserializar, capacidad=1000, consumidores=1, memoria_ids=5000):
+        self.procesar_updates = procesar_updates   # bot.process_new_updates
+        self.deserializar = deserializar           # telebot.types.Update.de_json
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._lock = threading.Lock()
+        self._vistos = set()
+        self._orden = collections.deque()
+        self._memoria_ids = memoria_ids
+        self._consumidores = consumidores
+        self._hilos = []
+
+    def iniciar(self):
+        if self._hilos: return
+        for i in range(self._consumidores):
+            h = threading.Thread(target=self._consumir, daemon=True, name=f"webhook-{i}")
+            h.start()
+            self._hilos.append(h)
+
+    def recibir(self, cuerpo):
+        """cuerpo: bytes/str del POST. False = cola llena (devolver 503)."""
+        try:
+            datos = json.loads(cuerpo)
+            update_id = datos["update_id"]
+        except (ValueError, KeyError, TypeError):
+            metricas.incrementar("webhook", resultado="invalido")
+            return True  # Reintentarlo no lo va a arreglar
+        with self._lock:
+            if update_id in self._vistos:
+                metricas.incrementar("webhook", resultado="duplicado")
+                return True
+            try:
+                self._cola.put_nowait(datos)
+            except queue.Full:
+                metricas.incrementar("webhook", resultado="lleno")
+                return False
+            self._vistos.add(update_id)
+            self._orden.append(update_id)
+            if len(self._orden) > self._memoria_ids:
+                self._vistos.discard(self._orden.popleft())
+        metricas.incrementar("webhook", resultado="encolado")
+        return True
+
+    def _consumir(self):
+        while True:
+            datos = self._cola.get()
+            try:
+                self.procesar_updates([self.deserializar(datos)])
+            except Exception as e:
+                metricas.incrementar("errores", donde="webhook")
+                print(f"⚠️ Update {datos.get('update_id')} no procesado: {e}")
+            finally:
+                self._cola.task_done()
+
+    def pendientes(self):
+        return self._cola.qsize()